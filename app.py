@@ -1,21 +1,93 @@
 import os
+import atexit
+import bisect
+import click
+import csv
+import glob
+import json
+import re
+import hashlib
+import hmac
+import itertools
+import shutil
+import socket
 import logging
-from datetime import datetime
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+import multiprocessing
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime, timedelta, timezone
+from flask import (Flask, Blueprint, abort, current_app, render_template, request, jsonify, redirect, url_for,
+                   flash, session, g, has_request_context, stream_with_context,
+                   before_render_template, template_rendered)
 from flask_sqlalchemy import SQLAlchemy
-from functools import wraps
-import requests as http_requests
-from openpyxl import load_workbook
-from io import BytesIO
-from apscheduler.schedulers.background import BackgroundScheduler
+from flask_sqlalchemy.session import Session
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from functools import partial, wraps
+from io import BytesIO, StringIO
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'faac-tracker-dev-key-change-in-prod')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///faac.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['ADMIN_PASSWORD'] = os.environ.get('ADMIN_PASSWORD', 'admin123')
+# Scraper and scheduler dependencies (requests, openpyxl, APScheduler) are
+# imported where they are used, so web workers that never scrape don't pay
+# for them at startup.
 
-db = SQLAlchemy(app)
+READ_ONLY_BIND = 'readonly'
+
+
+class RoutingSession(Session):
+    """Session that runs the queries of read-only requests (see
+    conditional_response) on the read-only engine, when one is configured.
+    Flushes always go to the primary engine."""
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_request_context() and g.get('_read_only')
+                and READ_ONLY_BIND in db.engines):
+            return db.engines[READ_ONLY_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+bp = Blueprint('main', __name__, cli_group=None)
+logger = logging.getLogger(__name__)
+
+
+# ── Money ───────────────────────────────────────────────────────────────────
+
+KOBO_PER_NAIRA = 100
+
+
+def to_kobo(naira):
+    """Naira amount -> whole kobo (int)."""
+    return int(round(naira * KOBO_PER_NAIRA))
+
+
+def from_kobo(kobo_amount):
+    """Whole kobo -> naira amount (float)."""
+    return kobo_amount / KOBO_PER_NAIRA
+
+
+class Kobo(db.TypeDecorator):
+    """A naira amount stored as a 64-bit integer number of kobo.
+
+    Python code, templates and the APIs keep working in naira floats; the
+    database holds exact integers, so SUM() does not drift and gross always
+    equals statutory + VAT. Wrap a column in kobo() to read the integers.
+    """
+    impl = db.BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_kobo(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_kobo(value)
+
+
+def kobo(column):
+    """column (a Kobo column or aggregate) as raw integer kobo."""
+    return db.type_coerce(column, db.BigInteger)
 
 
 # ── Models ──────────────────────────────────────────────────────────────────
@@ -38,6 +110,10 @@ class LGA(db.Model):
     state_id = db.Column(db.Integer, db.ForeignKey('states.id'), nullable=False)
     allocations = db.relationship('FAACAllocation', backref='lga', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_lgas_state_name', 'state_id', 'name'),
+    )
+
 
 class FAACAllocation(db.Model):
     __tablename__ = 'faac_allocations'
@@ -46,11 +122,24 @@ class FAACAllocation(db.Model):
     lga_id = db.Column(db.Integer, db.ForeignKey('lgas.id'), nullable=True)
     month = db.Column(db.Integer, nullable=False)
     year = db.Column(db.Integer, nullable=False)
-    statutory_allocation = db.Column(db.Float, default=0)
-    vat_allocation = db.Column(db.Float, default=0)
-    total_gross = db.Column(db.Float, default=0)
-    deductions = db.Column(db.Float, default=0)
-    net_allocation = db.Column(db.Float, default=0)
+    statutory_allocation = db.Column(Kobo, default=0)
+    vat_allocation = db.Column(Kobo, default=0)
+    total_gross = db.Column(Kobo, default=0)
+    deductions = db.Column(Kobo, default=0)
+    net_allocation = db.Column(Kobo, default=0)
+
+    __table_args__ = (
+        # Natural key. NULLs are distinct in a UNIQUE index, so state-level
+        # rows (lga_id IS NULL) get their own partial index below.
+        db.Index('uq_faac_allocations_period', 'state_id', 'lga_id', 'year', 'month', unique=True),
+        db.Index('uq_faac_allocations_state_period', 'state_id', 'year', 'month', unique=True,
+                 sqlite_where=db.text('lga_id IS NULL'),
+                 postgresql_where=db.text('lga_id IS NULL')),
+        # lga_detail history, and the latest state-level month (lga_id IS NULL)
+        db.Index('ix_faac_allocations_lga_period', 'lga_id', 'year', 'month'),
+        # Latest LGA month / LGA breakdown for a state
+        db.Index('ix_faac_allocations_state_period', 'state_id', 'year', 'month'),
+    )
 
 
 class IGR(db.Model):
@@ -59,7 +148,11 @@ class IGR(db.Model):
     state_id = db.Column(db.Integer, db.ForeignKey('states.id'), nullable=False)
     year = db.Column(db.Integer, nullable=False)
     quarter = db.Column(db.Integer, nullable=False)
-    amount = db.Column(db.Float, default=0)
+    amount = db.Column(Kobo, default=0)
+
+    __table_args__ = (
+        db.Index('ix_igr_state_period', 'state_id', 'year', 'quarter'),
+    )
 
 
 class ScrapeLog(db.Model):
@@ -68,10 +161,268 @@ class ScrapeLog(db.Model):
     run_date = db.Column(db.DateTime, nullable=False)
     target_month = db.Column(db.Integer, nullable=False)
     target_year = db.Column(db.Integer, nullable=False)
-    status = db.Column(db.String(20), nullable=False)  # 'success', 'failed', 'no_data'
+    status = db.Column(db.String(20), nullable=False)  # 'success', 'failed', 'no_data', 'unchanged'
     source = db.Column(db.String(100))  # 'nbs_excel', 'oagf', 'manual'
     states_added = db.Column(db.Integer, default=0)
     message = db.Column(db.Text)
+    run_key = db.Column(db.String(50), index=True)  # e.g. 'backfill:2020-01:2024-12'
+    content_hash = db.Column(db.String(64))  # SHA-256 of the workbook that was parsed
+    rows_inserted = db.Column(db.Integer, default=0)
+    rows_updated = db.Column(db.Integer, default=0)
+    rows_unchanged = db.Column(db.Integer, default=0)
+
+
+class ScrapeJob(db.Model):
+    """An admin-triggered scrape or backfill run on the background executor."""
+    __tablename__ = 'scrape_jobs'
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    kind = db.Column(db.String(20), nullable=False)  # 'scrape', 'backfill'
+    description = db.Column(db.String(100))
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'done', 'failed'
+    stage = db.Column(db.String(20))  # 'downloading', 'parsing', 'inserting'
+    months_total = db.Column(db.Integer, default=0)
+    months_done = db.Column(db.Integer, default=0)
+    rows_done = db.Column(db.Integer, default=0)
+    result = db.Column(db.Text)  # JSON return value, or the error message
+    created_at = db.Column(db.DateTime, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    owner = db.Column(db.String(120))  # process running the job, see _job_owner
+    heartbeat_at = db.Column(db.DateTime)  # refreshed while the owner is alive
+
+    def to_dict(self):
+        try:
+            result = json.loads(self.result) if self.status == 'done' and self.result else self.result
+        except ValueError:
+            result = self.result
+        return {
+            'id': self.id, 'kind': self.kind, 'description': self.description,
+            'status': self.status, 'stage': self.stage,
+            'months_total': self.months_total or 0, 'months_done': self.months_done or 0,
+            'rows_done': self.rows_done or 0, 'result': result,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class AllocationTotalsMixin:
+    """Summed allocation columns shared by the monthly rollup tables."""
+    statutory_allocation = db.Column(Kobo, default=0)
+    vat_allocation = db.Column(Kobo, default=0)
+    total_gross = db.Column(Kobo, default=0)
+    deductions = db.Column(Kobo, default=0)
+    net_allocation = db.Column(Kobo, default=0)
+
+
+class NationalMonthlyTotal(AllocationTotalsMixin, db.Model):
+    """Sum of all state-level allocations for a month."""
+    __tablename__ = 'rollup_national_monthly'
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    state_count = db.Column(db.Integer, default=0)
+
+
+class ZoneMonthlyTotal(AllocationTotalsMixin, db.Model):
+    """Sum of state-level allocations per geo-political zone for a month."""
+    __tablename__ = 'rollup_zone_monthly'
+    geo_zone = db.Column(db.String(50), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    state_count = db.Column(db.Integer, default=0)
+
+
+class StateLGAMonthlyTotal(AllocationTotalsMixin, db.Model):
+    """Sum of a state's LGA-level allocations for a month."""
+    __tablename__ = 'rollup_state_lga_monthly'
+    state_id = db.Column(db.Integer, db.ForeignKey('states.id'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    lga_count = db.Column(db.Integer, default=0)
+
+
+class DataVersion(db.Model):
+    """Single-row counter bumped whenever published allocation data changes."""
+    __tablename__ = 'data_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime)
+
+
+class SchedulerLease(db.Model):
+    """Time-limited claim on running scheduled jobs; one row per lease name."""
+    __tablename__ = 'scheduler_leases'
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)  # 'hostname:pid'
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+# ── Schema upgrades ─────────────────────────────────────────────────────────
+
+def _dedupe_allocations():
+    """Delete duplicate allocation rows, keeping the newest row per period."""
+    db.session.execute(db.text(
+        'DELETE FROM faac_allocations WHERE id NOT IN ('
+        ' SELECT MAX(id) FROM faac_allocations GROUP BY state_id, lga_id, year, month)'
+    ))
+    db.session.commit()
+
+
+def _float_money_columns(table, inspector):
+    """Return (reflected column types, Kobo columns still stored as Float) for table."""
+    reflected = {c['name']: c['type'] for c in inspector.get_columns(table.name)}
+    return reflected, [c.name for c in table.columns
+                       if isinstance(c.type, Kobo) and isinstance(reflected.get(c.name), db.Float)]
+
+
+def _migrate_money_columns():
+    """Convert naira Float money columns of an older database to Kobo integers.
+
+    SQLite cannot change a column's type, so each affected table is renamed,
+    recreated from its model and refilled; PostgreSQL alters the columns in
+    place. Rounding each float on its own can leave gross and net a kobo
+    off their parts, so allocation VAT and deductions are then derived from
+    the rounded amounts, as _kobo_split does for new data. Returns the names
+    of the tables converted.
+    """
+    inspector = db.inspect(db.engine)
+    migrated = []
+    for table in db.metadata.sorted_tables:
+        if not _float_money_columns(table, inspector)[1]:
+            continue
+        if table.name == FAACAllocation.__tablename__:
+            _dedupe_allocations()  # the recreated table has the unique keys
+        with db.engine.begin() as conn:
+            if conn.dialect.name == 'sqlite':
+                # pysqlite does not open a transaction for DDL by itself;
+                # IMMEDIATE takes the write lock before the types are re-read.
+                conn.exec_driver_sql('BEGIN IMMEDIATE')
+            else:
+                conn.exec_driver_sql(f'LOCK TABLE {table.name} IN ACCESS EXCLUSIVE MODE')
+            # Another process may have converted the table since the check above.
+            in_transaction = db.inspect(conn)
+            reflected, stale = _float_money_columns(table, in_transaction)
+            if not stale:
+                continue
+            if conn.dialect.name == 'sqlite':
+                indexes = [ix['name'] for ix in in_transaction.get_indexes(table.name)]
+                old = f'_{table.name}_naira'
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} RENAME TO {old}')
+                for name in indexes:
+                    conn.exec_driver_sql(f'DROP INDEX {name}')
+                table.create(conn)
+                columns = [c.name for c in table.columns if c.name in reflected]
+                values = [f'CAST(ROUND({c} * {KOBO_PER_NAIRA}) AS INTEGER)' if c in stale else c
+                          for c in columns]
+                conn.exec_driver_sql(f'INSERT INTO {table.name} ({", ".join(columns)}) '
+                                     f'SELECT {", ".join(values)} FROM {old}')
+                conn.exec_driver_sql(f'DROP TABLE {old}')
+            else:
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} ' + ', '.join(
+                    f'ALTER COLUMN {c} TYPE BIGINT USING ROUND({c} * {KOBO_PER_NAIRA})' for c in stale))
+            if table.name == FAACAllocation.__tablename__:
+                conn.exec_driver_sql(
+                    f'UPDATE {table.name} SET vat_allocation = total_gross - statutory_allocation, '
+                    f'deductions = total_gross - net_allocation')
+        logger.info(f'Converted {", ".join(stale)} in {table.name} to integer kobo.')
+        migrated.append(table.name)
+    return migrated
+
+
+def upgrade_db():
+    """Bring an existing database up to the current schema.
+
+    db.create_all() only creates missing tables, so columns and indexes
+    added to the models after a database was first created are added here.
+    New columns must be nullable or have a scalar default. Duplicate
+    allocation rows, which the unique keys would reject, are removed first.
+    Money columns still stored as naira floats are converted to integer kobo
+    and the rollups are rebuilt from the exact amounts.
+    """
+    db.create_all()
+    if _migrate_money_columns():
+        rebuild_rollups()
+        bump_data_version()
+        db.session.commit()
+    inspector = db.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        columns = {c['name'] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in columns:
+                continue
+            ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(db.engine.dialect)}'
+            if column.default is not None and column.default.is_scalar:
+                ddl += f' DEFAULT {column.default.arg!r}'
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql(ddl)
+            logger.info(f'Added column {column.name} to {table.name}.')
+
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        missing = [ix for ix in table.indexes if ix.name not in existing]
+        if not missing:
+            continue
+        if table.name == FAACAllocation.__tablename__ and any(ix.unique for ix in missing):
+            _dedupe_allocations()
+        for ix in missing:
+            ix.create(db.engine, checkfirst=True)
+            logger.info(f'Created index {ix.name} on {table.name}.')
+
+    # Rollup tables added to an already-populated database start out empty.
+    if NationalMonthlyTotal.query.first() is None and FAACAllocation.query.first() is not None:
+        rebuild_rollups()
+        db.session.commit()
+
+
+# ── Rollups ─────────────────────────────────────────────────────────────────
+
+ROLLUP_SUM_COLUMNS = ('statutory_allocation', 'vat_allocation', 'total_gross',
+                      'deductions', 'net_allocation')
+
+
+def _write_rollups(*criteria):
+    """Aggregate allocations matching criteria into the rollup tables."""
+    period = (FAACAllocation.year, FAACAllocation.month)
+    sums = [db.func.coalesce(db.func.sum(getattr(FAACAllocation, c)), 0) for c in ROLLUP_SUM_COLUMNS]
+    count = db.func.count(FAACAllocation.id)
+
+    national = db.session.query(*period, count, *sums).filter(
+        FAACAllocation.lga_id.is_(None), *criteria
+    ).group_by(*period)
+    for year, month, n, *totals in national:
+        db.session.add(NationalMonthlyTotal(year=year, month=month, state_count=n,
+                                            **dict(zip(ROLLUP_SUM_COLUMNS, totals))))
+
+    zones = db.session.query(State.geo_zone, *period, count, *sums).join(
+        State, FAACAllocation.state_id == State.id
+    ).filter(
+        FAACAllocation.lga_id.is_(None), *criteria
+    ).group_by(State.geo_zone, *period)
+    for zone, year, month, n, *totals in zones:
+        db.session.add(ZoneMonthlyTotal(geo_zone=zone, year=year, month=month, state_count=n,
+                                        **dict(zip(ROLLUP_SUM_COLUMNS, totals))))
+
+    lga_sums = db.session.query(FAACAllocation.state_id, *period, count, *sums).filter(
+        FAACAllocation.lga_id.isnot(None), *criteria
+    ).group_by(FAACAllocation.state_id, *period)
+    for state_id, year, month, n, *totals in lga_sums:
+        db.session.add(StateLGAMonthlyTotal(state_id=state_id, year=year, month=month, lga_count=n,
+                                            **dict(zip(ROLLUP_SUM_COLUMNS, totals))))
+
+
+def refresh_rollups(year, month):
+    """Recompute the rollup rows for one month. The caller commits."""
+    db.session.flush()
+    for model in (NationalMonthlyTotal, ZoneMonthlyTotal, StateLGAMonthlyTotal):
+        model.query.filter_by(year=year, month=month).delete()
+    _write_rollups(FAACAllocation.year == year, FAACAllocation.month == month)
+
+
+def rebuild_rollups():
+    """Recompute every rollup row from the raw allocations. The caller commits."""
+    db.session.flush()
+    for model in (NationalMonthlyTotal, ZoneMonthlyTotal, StateLGAMonthlyTotal):
+        model.query.delete()
+    _write_rollups()
 
 
 # ── Helpers ─────────────────────────────────────────────────────────────────
@@ -99,296 +450,1978 @@ def fmt_naira(amount):
     return f'₦{amount:,.0f}'
 
 
-app.jinja_env.filters['naira'] = fmt_naira
-app.jinja_env.globals['MONTH_NAMES'] = MONTH_NAMES
-app.jinja_env.globals['GEO_ZONES'] = GEO_ZONES
+bp.add_app_template_filter(fmt_naira, 'naira')
+bp.add_app_template_global(MONTH_NAMES, 'MONTH_NAMES')
+bp.add_app_template_global(GEO_ZONES, 'GEO_ZONES')
 
 
 def login_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         if not session.get('admin'):
-            return redirect(url_for('admin_login'))
+            return redirect(url_for('main.admin_login'))
         return f(*args, **kwargs)
     return decorated
 
 
-# ── Scraper ─────────────────────────────────────────────────────────────────
+def lga_counts_by_state(*state_ids):
+    """Return {state_id: number of LGAs} in one query, optionally for some states only."""
+    query = db.session.query(LGA.state_id, db.func.count(LGA.id)).group_by(LGA.state_id)
+    if state_ids:
+        query = query.filter(LGA.state_id.in_(state_ids))
+    return dict(query.all())
+
+
+# ── Query budgets ───────────────────────────────────────────────────────────
+
+class QueryBudgetExceeded(RuntimeError):
+    """A view issued more SQL statements than its declared budget."""
+
+
+def query_budget(limit):
+    """Declare the most SQL statements a view may issue for one request.
+
+    Budgets are enforced when the app is testing or ENFORCE_QUERY_BUDGETS
+    is set; check-query-budgets runs every public page against them.
+    """
+    def decorator(f):
+        f.query_budget = limit
+        return f
+    return decorator
+
+
+@bp.before_app_request
+def _reset_query_count():
+    g._query_count = 0
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g._query_count = g.get('_query_count', 0) + 1
+
+
+@bp.after_app_request
+def _check_query_budget(response):
+    budget = getattr(current_app.view_functions.get(request.endpoint), 'query_budget', None)
+    count = g.get('_query_count', 0)
+    if (budget is not None and count > budget
+            and (current_app.testing or current_app.config['ENFORCE_QUERY_BUDGETS'])):
+        raise QueryBudgetExceeded(f'{request.endpoint} issued {count} SQL queries (budget {budget}).')
+    return response
+
+
+# ── Request metrics ─────────────────────────────────────────────────────────
+# Opt-in with REQUEST_METRICS=1. Each request's SQL count, SQL time, template
+# render time and total time are sent in a Server-Timing header and added to
+# per-endpoint histograms kept in this process, shown on /admin/metrics and
+# exported in Prometheus text format at /admin/metrics.txt.
+
+METRIC_SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+METRIC_QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# name -> (bucket bounds, Prometheus help text)
+REQUEST_METRICS = {
+    'request_duration_seconds': (METRIC_SECONDS_BUCKETS, 'Time from the start of the request to the response.'),
+    'sql_duration_seconds': (METRIC_SECONDS_BUCKETS, 'Time spent executing SQL statements per request.'),
+    'sql_queries': (METRIC_QUERY_BUCKETS, 'SQL statements executed per request.'),
+    'template_duration_seconds': (METRIC_SECONDS_BUCKETS, 'Time spent rendering templates per request.'),
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts[i] holds values <= bounds[i], the last slot the rest."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """[(upper bound, count of values <= it)], ending with ('+Inf', count)."""
+        return list(zip((*self.bounds, '+Inf'), itertools.accumulate(self.counts)))
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating within its bucket, as Prometheus does."""
+        if not self.count:
+            return None
+        if not self.sum:
+            return 0.0
+        rank = q * self.count
+        lower, seen = 0.0, 0
+        for bound, n in zip(self.bounds, self.counts):
+            if n and seen + n >= rank:
+                return lower + (bound - lower) * (rank - seen) / n
+            lower, seen = bound, seen + n
+        return self.bounds[-1]
+
+
+class RequestMetrics:
+    """Per-endpoint histograms of request timings for this process."""
+
+    def __init__(self):
+        self.histograms = {}  # (endpoint, metric name) -> Histogram
+        self.started_at = datetime.utcnow()
+        self.lock = threading.Lock()
+
+    def observe(self, endpoint, sample):
+        with self.lock:
+            for name, value in sample.items():
+                hist = self.histograms.get((endpoint, name))
+                if hist is None:
+                    hist = self.histograms[(endpoint, name)] = Histogram(REQUEST_METRICS[name][0])
+                hist.observe(value)
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+            self.started_at = datetime.utcnow()
+
+    def summary(self):
+        """[{'endpoint', 'requests', metric: {'mean', 'p50', 'p90', 'p99', 'buckets'}}] by endpoint."""
+        with self.lock:
+            endpoints = sorted({endpoint for endpoint, _ in self.histograms})
+            rows = []
+            for endpoint in endpoints:
+                row = {'endpoint': endpoint,
+                       'requests': self.histograms[(endpoint, 'request_duration_seconds')].count}
+                for name in REQUEST_METRICS:
+                    hist = self.histograms[(endpoint, name)]
+                    row[name] = {
+                        'mean': hist.sum / hist.count, 'p50': hist.quantile(0.5),
+                        'p90': hist.quantile(0.9), 'p99': hist.quantile(0.99),
+                        'buckets': list(zip((*hist.bounds, '+Inf'), hist.counts)),
+                    }
+                rows.append(row)
+            return rows
+
+    def prometheus_text(self, prefix='faac_'):
+        """Export in Prometheus text format. Every gunicorn worker keeps its own
+        histograms, so each series carries the worker's pid; sum over it."""
+        lines = []
+        pid = os.getpid()
+        with self.lock:
+            for name, (_, help_text) in REQUEST_METRICS.items():
+                lines.append(f'# HELP {prefix}{name} {help_text}')
+                lines.append(f'# TYPE {prefix}{name} histogram')
+                for (endpoint, metric), hist in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    label = f'endpoint="{endpoint}",pid="{pid}"'
+                    for bound, count in hist.cumulative():
+                        lines.append(f'{prefix}{name}_bucket{{{label},le="{bound}"}} {count}')
+                    lines.append(f'{prefix}{name}_sum{{{label}}} {hist.sum:.6f}')
+                    lines.append(f'{prefix}{name}_count{{{label}}} {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
+
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['_query_started'] = time.perf_counter()
+
+
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop('_query_started')
+    if has_request_context() and '_timing' in g:
+        g._timing['sql'] += elapsed
+
+
+def _start_template_timer(sender, template, context, **extra):
+    if '_timing' in g:
+        g._timing['template_started'] = time.perf_counter()
+
+
+def _stop_template_timer(sender, template, context, **extra):
+    if '_timing' in g and 'template_started' in g._timing:
+        g._timing['template'] += time.perf_counter() - g._timing.pop('template_started')
+
+
+@bp.before_app_request
+def _start_request_timer():
+    if current_app.config['REQUEST_METRICS']:
+        g._timing = {'start': time.perf_counter(), 'sql': 0.0, 'template': 0.0}
+
+
+@bp.after_app_request
+def _record_request_timing(response):
+    timing = g.pop('_timing', None)
+    if timing is None:
+        return response
+    total = time.perf_counter() - timing['start']
+    queries = g.get('_query_count', 0)
+    response.headers['Server-Timing'] = (
+        f'sql;dur={timing["sql"] * 1000:.2f};desc="{queries} queries", '
+        f'tpl;dur={timing["template"] * 1000:.2f}, total;dur={total * 1000:.2f}'
+    )
+    request_metrics.observe(request.endpoint or 'unmatched', {
+        'request_duration_seconds': total,
+        'sql_duration_seconds': timing['sql'],
+        'sql_queries': queries,
+        'template_duration_seconds': timing['template'],
+    })
+    return response
+
+
+def init_request_metrics(app):
+    """Hook the SQL and template timers into app. Called by create_app when REQUEST_METRICS is on."""
+    with app.app_context():
+        for engine in db.engines.values():
+            db.event.listen(engine, 'before_cursor_execute', _start_query_timer)
+            db.event.listen(engine, 'after_cursor_execute', _stop_query_timer)
+    before_render_template.connect(_start_template_timer, app)
+    template_rendered.connect(_stop_template_timer, app)
+
+
+# ── Search index ────────────────────────────────────────────────────────────
+
+_WORD_SPLIT_RE = re.compile(r'[^a-z0-9]+')
+
+
+class SearchIndex:
+    """In-memory autocomplete index over state and LGA names.
+
+    Names are indexed by their 2- and 3-character n-grams, so a query only
+    has to verify the handful of names sharing its n-grams. Result dicts,
+    including their URLs, are built once when the index is built.
+    """
+
+    def __init__(self, version=None):
+        self.version = version  # data version the index was built from
+        self.states = []  # [(name_lower, result)]
+        self.lgas = []
+        self.grams = ({}, {})  # per kind: n-gram -> set of positions
+
+    @staticmethod
+    def _ngrams(text, n):
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+    def _add(self, kind, name, result):
+        entries = self.lgas if kind else self.states
+        pos = len(entries)
+        key = name.lower()
+        entries.append((key, result))
+        for n in (2, 3):
+            for gram in self._ngrams(key, n):
+                self.grams[kind].setdefault(gram, set()).add(pos)
+
+    @classmethod
+    def build(cls, version=None):
+        """Build the index from the database. Needs a request context for url_for."""
+        index = cls(version)
+        state_names = {}
+        for s in State.query.order_by(State.name).all():
+            state_names[s.id] = s.name
+            index._add(0, s.name, {'type': 'state', 'name': s.name,
+                                   'url': url_for('main.state_detail', name=s.name)})
+        # In ix_lgas_state_name order, so SQLite reads the covering index, not the table.
+        rows = sorted((name, state_names[state_id])
+                      for state_id, name in db.session.query(LGA.state_id, LGA.name)
+                      .order_by(LGA.state_id, LGA.name))
+        for lga_name, state_name in rows:
+            index._add(1, lga_name, {'type': 'lga', 'name': f'{lga_name} ({state_name})',
+                                     'url': url_for('main.lga_detail', state_name=state_name,
+                                                    lga_name=lga_name)})
+        return index
+
+    @staticmethod
+    def _rank(key, q):
+        """0 = exact, 1 = prefix, 2 = word prefix, 3 = substring."""
+        if key == q:
+            return 0
+        if key.startswith(q):
+            return 1
+        if any(word.startswith(q) for word in _WORD_SPLIT_RE.split(key)):
+            return 2
+        return 3
+
+    def _search_kind(self, kind, q, limit):
+        entries = self.lgas if kind else self.states
+        grams = self._ngrams(q, 3 if len(q) >= 3 else 2)
+        postings = sorted((self.grams[kind].get(g, set()) for g in grams), key=len)
+        if not postings:
+            return []
+        candidates = set.intersection(*postings)
+        hits = []
+        for pos in candidates:
+            key, result = entries[pos]
+            if q in key:
+                hits.append((self._rank(key, q), pos, result))
+        hits.sort(key=lambda h: h[:2])
+        return [h[2] for h in hits[:limit]]
+
+    def search(self, q, limit=5):
+        """Return up to `limit` states followed by up to `limit` LGAs matching q."""
+        q = q.strip().lower()
+        if len(q) < 2:
+            return []
+        return self._search_kind(0, q, limit) + self._search_kind(1, q, limit)
+
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """Return the search index for the current data version, rebuilding it if the data changed.
+
+    Keyed on the shared data version, so a reseed or reference-data change
+    made by the CLI or another worker reaches this process too.
+    """
+    global _search_index
+    version = get_data_version()
+    index = _search_index
+    if index is None or index.version != version:
+        with _search_index_lock:
+            if _search_index is None or _search_index.version != version:
+                _search_index = SearchIndex.build(version)
+            index = _search_index
+    return index
+
+
+def invalidate_search_index():
+    """Drop the search index; call after states or LGAs change."""
+    global _search_index
+    _search_index = None
+
+
+# ── Response cache ──────────────────────────────────────────────────────────
+
+def bump_data_version():
+    """Mark the dataset as changed. The caller commits."""
+    updated = DataVersion.query.filter_by(id=1).update({
+        DataVersion.version: DataVersion.version + 1,
+        DataVersion.updated_at: datetime.utcnow(),
+    })
+    if not updated:
+        db.session.add(DataVersion(id=1, version=1, updated_at=datetime.utcnow()))
+    g.pop('_data_state', None)
 
-logger = logging.getLogger(__name__)
 
+def get_data_state():
+    """Return (version, updated_at) of the dataset, read once per request.
+
+    updated_at is set by the last successful scrape, admin write or seed.
+    """
+    if '_data_state' not in g:
+        row = db.session.query(DataVersion.version, DataVersion.updated_at).filter_by(id=1).first()
+        g._data_state = (row.version, row.updated_at) if row else (0, None)
+    return g._data_state
+
+
+@bp.before_app_request
+def _reset_data_state():
+    # g outlives a request when an app context was already pushed (CLI, tests).
+    g.pop('_data_state', None)
+    g.pop('_stale_response', None)
+
+
+def get_data_version():
+    return get_data_state()[0]
+
+
+def _request_key(view_args):
+    return (request.endpoint, tuple(sorted(view_args.items())),
+            tuple(sorted(request.args.items(multi=True))))
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of rendered public pages.
+
+    Entries are keyed on the data version, so a write made by any worker
+    makes every older entry unreachable; they are dropped the next time
+    this process sees the new version.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (body, status, mimetype)
+        self.size = 0
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_entries = app.config['RESPONSE_CACHE_MAX_ENTRIES']
+        self.max_bytes = app.config['RESPONSE_CACHE_MAX_BYTES']
+
+    def _sync_version(self, version):
+        if version != self.version:
+            self.entries.clear()
+            self.size = 0
+            self.version = version
+
+    def get(self, key, version):
+        with self.lock:
+            self._sync_version(version)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, entry):
+        body = entry[0]
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            self._sync_version(version)
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+            self.entries[key] = entry
+            self.size += len(body)
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted[0])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'version': self.version,
+            }
+
+
+response_cache = ResponseCache()
+
+
+def cached_response(f):
+    """Serve a public GET page from response_cache when the data is unchanged."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        # Pages carrying flashed messages are personal; never cache them.
+        if session.get('_flashes'):
+            return f(*args, **kwargs)
+        version = get_data_version()
+        key = _request_key(kwargs)
+        entry = response_cache.get(key, version)
+        if entry is not None:
+            body, status, mimetype = entry
+            resp = current_app.response_class(body, status=status, mimetype=mimetype)
+            resp.headers['X-Cache'] = 'HIT'
+            return resp
+        resp = current_app.make_response(f(*args, **kwargs))
+        if resp.status_code == 200 and not resp.direct_passthrough and not g.get('_stale_response'):
+            response_cache.put(key, version, (resp.get_data(), resp.status_code, resp.mimetype))
+        resp.headers['X-Cache'] = 'MISS'
+        return resp
+    return decorated
+
+
+def _http_last_modified(updated_at):
+    """Return updated_at as a Last-Modified value, or None while it can't be one.
+
+    HTTP dates have whole seconds, so the value is rounded up, and it is
+    withheld until that second has passed: a later write in the same second
+    would otherwise share it and revalidate as unchanged.
+    """
+    if updated_at is None:
+        return None
+    last_modified = updated_at.replace(microsecond=0)
+    if updated_at.microsecond:
+        last_modified += timedelta(seconds=1)
+    if last_modified > datetime.utcnow():
+        return None
+    return last_modified.replace(tzinfo=timezone.utc)
+
+
+def conditional_response(f=None, *, content_coding=None):
+    """Add a strong ETag and Last-Modified derived from the data version.
+
+    The ETag is only ever sent with a 200, so a request whose If-None-Match
+    names it asks for a page that exists at this data version: it gets a 304
+    before the view runs, with no query or template work. `If-None-Match: *`
+    and If-Modified-Since prove nothing about the URL, so those requests run
+    the view and get a 304 only if it returns a 200. The request is marked
+    read-only, so with the 'web' database profile its queries run on
+    read-only SQLite connections.
+
+    A view that negotiates its Content-Encoding passes content_coding, a
+    function returning the coding it will use for this request, so each
+    encoding gets its own strong ETag.
+
+    A page built from an analytics engine older than the data version is
+    sent without validators; the next request gets the rebuilt one.
+    """
+    if f is None:
+        return partial(conditional_response, content_coding=content_coding)
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g._read_only = True  # public pages never write: use read-only connections
+        if session.get('_flashes'):
+            return f(*args, **kwargs)
+        version, updated_at = get_data_state()
+        key = (version, _request_key(kwargs))
+        if content_coding:
+            key += (content_coding(),)
+        etag = hashlib.sha1(repr(key).encode()).hexdigest()
+        last_modified = _http_last_modified(updated_at)
+
+        if_none_match = request.if_none_match
+        if if_none_match and not if_none_match.star_tag and if_none_match.contains(etag):
+            resp = current_app.response_class(status=304)
+        else:
+            resp = current_app.make_response(f(*args, **kwargs))
+            if resp.status_code != 200 or g.get('_stale_response'):
+                return resp
+            if if_none_match:
+                not_modified = if_none_match.contains(etag)
+            else:
+                not_modified = (last_modified is not None and request.if_modified_since is not None
+                                and last_modified <= request.if_modified_since)
+            if not_modified:
+                resp.close()
+                resp = current_app.response_class(status=304)
+        resp.set_etag(etag)
+        if last_modified:
+            resp.last_modified = last_modified
+        resp.cache_control.no_cache = True
+        return resp
+    return decorated
+
+
+# ── Scraper ─────────────────────────────────────────────────────────────────
+
+NBS_BASE_URL = os.environ.get('NBS_BASE_URL', 'https://nigerianstat.gov.ng')
 NBS_URL_PATTERNS = [
-    'https://nigerianstat.gov.ng/resource/Disbursement%20{month},%20{year}.xlsx',
-    'https://nigerianstat.gov.ng/resource/FAAC%20Disbursement%20{month}%20{year}.xlsx',
-    'https://nigerianstat.gov.ng/resource/{month}%20{year}%20Disbursement.xlsx',
+    '{base}/resource/Disbursement%20{month},%20{year}.xlsx',
+    '{base}/resource/FAAC%20Disbursement%20{month}%20{year}.xlsx',
+    '{base}/resource/{month}%20{year}%20Disbursement.xlsx',
 ]
+NBS_PROBE_TIMEOUT = (5, 10)  # (connect, read) seconds for HEAD/range probes
+NBS_DOWNLOAD_TIMEOUT = 30
+NBS_MIN_WORKBOOK_BYTES = 1000
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def _get_http_session():
+    """Return the shared, connection-pooled requests session."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            import requests
+            http = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(len(NBS_URL_PATTERNS), 10))
+            http.mount('http://', adapter)
+            http.mount('https://', adapter)
+            _http_session = http
+        return _http_session
+
+
+class NBSUnavailable(RuntimeError):
+    """NBS could not be reached or answered with a server error, so whether
+    a workbook exists is unknown; unlike a 404 the month should be retried."""
+
+
+def _nbs_request(method, url, **kwargs):
+    """Send a request through the shared session; raise NBSUnavailable on
+    network errors and 5xx answers."""
+    import requests
+    try:
+        resp = _get_http_session().request(method, url, **kwargs)
+    except requests.RequestException as e:
+        raise NBSUnavailable(f'{method} {url}: {e}') from e
+    if resp.status_code >= 500 and resp.status_code != 501:
+        resp.close()
+        raise NBSUnavailable(f'{method} {url}: HTTP {resp.status_code}')
+    return resp
+
+
+def _probe_nbs_url(url):
+    """Cheaply check whether url serves a workbook, without downloading it.
+
+    Tries HEAD first; servers that reject HEAD get a one-kilobyte range GET.
+    Returns False for a 404 or a too-short file; raises NBSUnavailable when
+    the answer is unknown.
+    """
+    resp = _nbs_request('HEAD', url, timeout=NBS_PROBE_TIMEOUT, allow_redirects=True)
+    if resp.status_code == 200:
+        length = resp.headers.get('Content-Length')
+        return length is None or int(length) > NBS_MIN_WORKBOOK_BYTES
+    if resp.status_code not in (405, 501):
+        return False
+    resp = _nbs_request('GET', url, timeout=NBS_PROBE_TIMEOUT, headers={'Range': 'bytes=0-1023'}, stream=True)
+    resp.close()
+    return resp.status_code in (200, 206)
 
 
 def _build_state_lookup():
-    """Build a lookup dict mapping lowercase state name variants to State objects."""
+    """Build a lookup dict mapping lowercase state name variants to state ids."""
     states = State.query.all()
     lookup = {}
     for s in states:
-        lookup[s.name.lower()] = s
-        lookup[s.name.lower().replace(' ', '')] = s
+        lookup[s.name.lower()] = s.id
+        lookup[s.name.lower().replace(' ', '')] = s.id
         # Handle FCT variations
         if s.name == 'FCT':
-            lookup['fct abuja'] = s
-            lookup['fct, abuja'] = s
-            lookup['federal capital territory'] = s
+            lookup['fct abuja'] = s.id
+            lookup['fct, abuja'] = s.id
+            lookup['federal capital territory'] = s.id
     return lookup
 
 
-def _try_download_nbs_excel(month_name, year):
-    """Try each NBS URL pattern; return workbook or None."""
-    for pattern in NBS_URL_PATTERNS:
-        url = pattern.format(month=month_name, year=year)
+class WorkbookCache:
+    """Content-addressed on-disk store of downloaded NBS workbooks.
+
+    Files live under objects/ named by their SHA-256. A small JSON record
+    per URL under urls/ keeps the hash plus the ETag and Last-Modified
+    needed to revalidate it. Writes go through a temp file and os.replace,
+    so concurrent backfill threads never see half-written files.
+    """
+
+    def __init__(self, root=None):
+        self.root = root
+
+    def init_app(self, app):
+        self.root = app.config['NBS_CACHE_DIR']
+
+    def _meta_path(self, url):
+        return os.path.join(self.root, 'urls', hashlib.sha1(url.encode()).hexdigest() + '.json')
+
+    def _blob_path(self, sha256):
+        return os.path.join(self.root, 'objects', sha256[:2], sha256 + '.xlsx')
+
+    @staticmethod
+    def _write_atomic(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def lookup(self, url):
+        """Return the cached record for url, or None if it or its file is missing."""
         try:
-            resp = http_requests.get(url, timeout=30)
-            if resp.status_code == 200 and len(resp.content) > 1000:
-                wb = load_workbook(BytesIO(resp.content), read_only=True, data_only=True)
-                return wb, url
-        except Exception:
-            continue
+            with open(self._meta_path(url)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if os.path.exists(self._blob_path(meta['sha256'])) else None
+
+    def read(self, sha256):
+        with open(self._blob_path(sha256), 'rb') as f:
+            return f.read()
+
+    def store(self, url, content, month, year, etag=None, last_modified=None):
+        """Save content for url and return its SHA-256."""
+        sha256 = hashlib.sha256(content).hexdigest()
+        if not os.path.exists(self._blob_path(sha256)):
+            self._write_atomic(self._blob_path(sha256), content)
+        meta = {'url': url, 'sha256': sha256, 'month': month, 'year': year,
+                'etag': etag, 'last_modified': last_modified,
+                'fetched_at': datetime.utcnow().isoformat()}
+        self._write_atomic(self._meta_path(url), json.dumps(meta).encode())
+        return sha256
+
+    def entries(self):
+        """Yield every cached record, ordered by target period."""
+        metas = []
+        for path in glob.glob(os.path.join(self.root, 'urls', '*.json')):
+            try:
+                with open(path) as f:
+                    metas.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        yield from sorted(metas, key=lambda m: (m['year'], m['month'], m['url']))
+
+
+workbook_cache = WorkbookCache()
+
+
+def _fetch_nbs_workbook(url, month, year):
+    """GET url, revalidating any cached copy. Returns (content, sha256) or (None, None)."""
+    cached = workbook_cache.lookup(url)
+    headers = {}
+    if cached and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached.get('last_modified'):
+        headers['If-Modified-Since'] = cached['last_modified']
+
+    resp = _nbs_request('GET', url, timeout=NBS_DOWNLOAD_TIMEOUT, headers=headers)
+    if resp.status_code == 304 and cached:
+        logger.info(f'NBS workbook unchanged (304): {url}')
+        return workbook_cache.read(cached['sha256']), cached['sha256']
+    # xlsx files are zip archives
+    if (resp.status_code == 200 and len(resp.content) > NBS_MIN_WORKBOOK_BYTES
+            and resp.content[:2] == b'PK'):
+        sha256 = workbook_cache.store(url, resp.content, month, year,
+                                      etag=resp.headers.get('ETag'),
+                                      last_modified=resp.headers.get('Last-Modified'))
+        return resp.content, sha256
     return None, None
 
 
-def _parse_excel_data(wb, state_lookup):
-    """Parse FAAC allocation data from an NBS Excel workbook.
+def _download_nbs_excel(month, year, base_url=None):
+    """Probe every NBS URL pattern at once; return (xlsx bytes, url, sha256) or Nones.
 
-    Returns list of dicts with keys: state_id, statutory, vat, deductions, net.
+    Only URLs whose probe succeeds are downloaded in full, in the order the
+    probes finish. Once a workbook arrives the function returns without
+    waiting for the remaining probes; they finish in the background and
+    their results are dropped. Raises NBSUnavailable if no workbook was
+    found and any URL failed for a reason other than not being there.
     """
-    records = []
-    ws = wb.active
+    month_name = MONTH_NAMES[month]
+    urls = [p.format(base=base_url or NBS_BASE_URL, month=month_name, year=year) for p in NBS_URL_PATTERNS]
+    executor = ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix='nbs-probe')
+    errors = []
+    try:
+        futures = {executor.submit(_probe_nbs_url, url): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                if not future.result():
+                    continue
+                content, sha256 = _fetch_nbs_workbook(url, month, year)
+            except NBSUnavailable as e:
+                errors.append(str(e))
+                continue
+            if content:
+                return content, url, sha256
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    if errors:
+        raise NBSUnavailable(f'{len(errors)} of {len(urls)} NBS URLs failed: {"; ".join(errors)}')
+    return None, None, None
+
+
+def _parse_workbook_bytes(content, state_lookup, lga_lookup=None):
+    """Load an xlsx file from bytes and parse it. Safe to run in a worker process."""
+    from openpyxl import load_workbook
+    wb = load_workbook(BytesIO(content), read_only=True, data_only=True)
+    try:
+        return _parse_excel_data(wb, state_lookup, lga_lookup)
+    finally:
+        wb.close()
 
-    # Find the header row and column indices
-    header_row = None
-    col_map = {}
-    for row in ws.iter_rows(min_row=1, max_row=20, values_only=False):
-        for cell in row:
-            val = str(cell.value or '').strip().lower()
-            if 'state' in val or 's/n' in val:
-                header_row = cell.row
-                break
-        if header_row:
-            # Map column headers
-            for cell in row:
-                val = str(cell.value or '').strip().lower()
-                if 'statutory' in val:
-                    col_map['statutory'] = cell.column - 1
-                elif 'vat' in val:
-                    col_map['vat'] = cell.column - 1
-                elif 'deduction' in val:
-                    col_map['deductions'] = cell.column - 1
-                elif 'net' in val:
-                    col_map['net'] = cell.column - 1
-            break
 
-    if not header_row:
-        return records
+_NON_ALPHA_RE = re.compile(r'[^a-z ]+')
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+_LEADING_NUMBER_RE = re.compile(r'^\s*\d+\s*[.):-]?\s*')
+_SUMMARY_ROW_RE = re.compile(r'^\W*(grand|total|sum\b|note)')  # anchored: 'Sumaila' is an LGA
+# The whole header cell, punctuation dropped: 'Share to LGAs' is an amount column
+_LGA_HEADER_RE = re.compile(r'(name of )?(lga|local government( area| council)?)s?( name)?')
+HEADER_SCAN_ROWS = 20
 
-    # Parse data rows
-    for row in ws.iter_rows(min_row=header_row + 1, values_only=True):
-        if not row or not row[0]:
-            continue
 
-        cell_val = str(row[0]).strip().lower()
-        # Skip summary/total rows
-        if any(kw in cell_val for kw in ['total', 'grand', 'sum', 'note']):
-            continue
+def normalize_lga_name(name):
+    """Normalize an LGA name for lookups: lowercase, numbering and punctuation removed."""
+    name = _LEADING_NUMBER_RE.sub('', str(name).lower())
+    return _NON_ALNUM_RE.sub(' ', name).strip()
 
-        state = state_lookup.get(cell_val)
-        if not state:
-            # Try removing numbers/punctuation (e.g. "1. Abia" → "abia")
-            cleaned = ''.join(c for c in cell_val if c.isalpha() or c == ' ').strip()
-            state = state_lookup.get(cleaned)
 
-        if not state:
-            continue
+def _build_lga_lookup():
+    """Build a lookup dict mapping (state_id, normalized LGA name) to LGA ids."""
+    return {(state_id, normalize_lga_name(name)): lga_id
+            for lga_id, name, state_id in db.session.query(LGA.id, LGA.name, LGA.state_id)}
 
-        def safe_float(val):
-            if val is None:
-                return 0.0
-            try:
-                return float(val)
-            except (ValueError, TypeError):
-                return 0.0
 
-        statutory = safe_float(row[col_map.get('statutory', 1)])
-        vat = safe_float(row[col_map.get('vat', 2)])
-        deductions = safe_float(row[col_map.get('deductions', 3)])
-        net = safe_float(row[col_map.get('net', 4)])
+def _to_float(val):
+    if val is None:
+        return 0.0
+    try:
+        return float(val)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def _match_state(val, state_lookup):
+    key = str(val).strip().lower()
+    state_id = state_lookup.get(key)
+    if not state_id:
+        # Try removing numbers/punctuation (e.g. "1. Abia" → "abia")
+        state_id = state_lookup.get(_NON_ALPHA_RE.sub('', key).strip())
+    return state_id
+
+
+def _map_header(row):
+    """Return a column map if row looks like a header row, else None."""
+    col_map = {}
+    for i, cell in enumerate(row):
+        val = str(cell).strip().lower() if cell is not None else ''
+        if not val:
+            continue
+        if _LGA_HEADER_RE.fullmatch(' '.join(_NON_ALNUM_RE.sub(' ', val).split())):
+            col_map.setdefault('lga', i)
+        elif 'state' in val:
+            col_map.setdefault('state', i)
+        elif 's/n' in val:
+            col_map.setdefault('sn', i)
+        elif 'statutory' in val:
+            col_map['statutory'] = i
+        elif 'vat' in val:
+            col_map['vat'] = i
+        elif 'deduction' in val:
+            col_map['deductions'] = i
+        elif 'net' in val:
+            col_map['net'] = i
+    if not col_map.keys() & {'state', 'sn', 'lga'}:
+        return None
+    return col_map
+
+
+def _parse_sheet(ws, state_lookup, lga_lookup):
+    """Yield allocation records from one worksheet in a single streaming pass."""
+    rows = ws.iter_rows(values_only=True)
+    col_map = None
+    for _, row in zip(range(HEADER_SCAN_ROWS), rows):
+        col_map = _map_header(row)
+        if col_map:
+            break
+    if not col_map:
+        return
+
+    lga_col = col_map.get('lga')
+    if lga_col is None:
+        name_col, state_col = col_map.get('state', 0), None
+    else:
+        name_col, state_col = lga_col, col_map.get('state')
+        sheet_state_id = _match_state(ws.title, state_lookup)
+    # Without headers, numbers follow the name column as in the NBS layout
+    stat_col = col_map.get('statutory', name_col + 1)
+    vat_col = col_map.get('vat', name_col + 2)
+    ded_col = col_map.get('deductions', name_col + 3)
+    net_col = col_map.get('net', name_col + 4)
+    width = max(name_col, stat_col, vat_col, ded_col, net_col, state_col or 0) + 1
+
+    for row in rows:
+        if not row or len(row) < width:
+            row = tuple(row or ()) + (None,) * (width - len(row or ()))
+        name = row[name_col]
+        if not name:
+            continue
+        name = str(name)
+        if _SUMMARY_ROW_RE.match(name.lower()):
+            continue
 
+        if lga_col is None:
+            state_id, lga_id = _match_state(name, state_lookup), None
+            if not state_id:
+                continue
+        else:
+            state_id = _match_state(row[state_col], state_lookup) if state_col is not None else sheet_state_id
+            lga_id = lga_lookup.get((state_id, normalize_lga_name(name))) if state_id else None
+            if not lga_id:
+                continue
+
+        statutory = _to_float(row[stat_col])
+        net = _to_float(row[net_col])
         if net <= 0 and statutory <= 0:
             continue
 
-        records.append({
-            'state_id': state.id,
+        yield {
+            'state_id': state_id,
+            'lga_id': lga_id,
             'statutory': statutory,
-            'vat': vat,
-            'deductions': deductions,
+            'vat': _to_float(row[vat_col]),
+            'deductions': _to_float(row[ded_col]),
             'net': net,
-        })
+        }
+
+
+def _parse_excel_data(wb, state_lookup, lga_lookup=None):
+    """Parse FAAC allocation data from every sheet of an NBS Excel workbook.
+
+    Sheets with a state column give state-level rows; sheets with an LGA
+    column give LGA rows, with the state taken from a state column or the
+    sheet name. Each sheet is read in one pass over iter_rows. The first
+    row found for a state or LGA wins.
+
+    Returns list of dicts with keys: state_id, lga_id (None for state
+    rows), statutory, vat, deductions, net.
+    """
+    lga_lookup = lga_lookup or {}
+    records = {}
+    for ws in wb.worksheets:
+        for rec in _parse_sheet(ws, state_lookup, lga_lookup):
+            records.setdefault((rec['state_id'], rec['lga_id']), rec)
+    return list(records.values())
+
+
+def _log_scrape(now, target_month, target_year, status, source, message, states_added=0,
+                run_key=None, content_hash=None, rows=(0, 0, 0)):
+    db.session.add(ScrapeLog(
+        run_date=now, target_month=target_month, target_year=target_year,
+        status=status, source=source, states_added=states_added,
+        message=message, run_key=run_key, content_hash=content_hash,
+        rows_inserted=rows[0], rows_updated=rows[1], rows_unchanged=rows[2],
+    ))
+
+
+def _already_ingested(sha256, target_month, target_year):
+    """True if this exact workbook was already ingested successfully for the month."""
+    return db.session.query(ScrapeLog.id).filter_by(
+        target_month=target_month, target_year=target_year,
+        status='success', content_hash=sha256,
+    ).first() is not None
+
+
+def _log_unchanged(now, target_month, target_year, source_url, sha256, run_key=None):
+    _log_scrape(now, target_month, target_year, 'unchanged', 'nbs_excel',
+                f'Workbook at {source_url} is unchanged since the last successful scrape '
+                f'(sha256 {sha256[:12]}). Not re-parsed.', run_key=run_key, content_hash=sha256)
+    db.session.commit()
+    logger.info(f'Scrape skipped: {source_url} unchanged.')
+
+
+UPSERT_VALUE_COLUMNS = ('statutory_allocation', 'vat_allocation', 'total_gross',
+                        'deductions', 'net_allocation')
+
+
+def _upsert_allocations(records, year, month):
+    """Write one month of parsed records with INSERT ... ON CONFLICT DO UPDATE.
+
+    Rows are matched on the natural key: (state_id, lga_id, year, month) for
+    LGA rows and the partial unique index on (state_id, year, month) for state
+    rows, whose lga_id is NULL. Rows already holding the same figures are
+    left alone. Does not commit. Returns (inserted, updated, unchanged).
+    """
+    stored = {(state_id, lga_id): values for state_id, lga_id, *values in db.session.query(
+        FAACAllocation.state_id, FAACAllocation.lga_id,
+        *(kobo(getattr(FAACAllocation, col)) for col in UPSERT_VALUE_COLUMNS),
+    ).filter_by(year=year, month=month)}
+
+    pending = {'state': [], 'lga': []}
+    inserted = updated = unchanged = 0
+    for rec in records:
+        # Compared and summed in kobo, so gross is exactly statutory + VAT
+        statutory, vat = to_kobo(rec['statutory']), to_kobo(rec['vat'])
+        amounts = [statutory, vat, statutory + vat, to_kobo(rec['deductions']), to_kobo(rec['net'])]
+        current = stored.get((rec['state_id'], rec['lga_id']))
+        if current is None:
+            inserted += 1
+        elif list(current) == amounts:
+            unchanged += 1
+            continue
+        else:
+            updated += 1
+        row = {'state_id': rec['state_id'], 'lga_id': rec['lga_id'], 'year': year, 'month': month}
+        row.update(zip(UPSERT_VALUE_COLUMNS, map(from_kobo, amounts)))
+        pending['state' if rec['lga_id'] is None else 'lga'].append(row)
+
+    from sqlalchemy.dialects import postgresql, sqlite
+    dialect = postgresql if db.engine.dialect.name == 'postgresql' else sqlite
+    table = FAACAllocation.__table__
+    for kind, rows in pending.items():
+        if not rows:
+            continue
+        stmt = dialect.insert(table)
+        if kind == 'state':
+            conflict = {'index_elements': ['state_id', 'year', 'month'],
+                        'index_where': table.c.lga_id.is_(None)}
+        else:
+            conflict = {'index_elements': ['state_id', 'lga_id', 'year', 'month']}
+        stmt = stmt.on_conflict_do_update(
+            set_={col: stmt.excluded[col] for col in UPSERT_VALUE_COLUMNS}, **conflict)
+        db.session.execute(stmt, rows)
+    return inserted, updated, unchanged
+
+
+def _ingest_month(records, target_month, target_year, source_url, now, run_key=None, content_hash=None):
+    """Upsert one month of parsed state and LGA records and log the outcome. Commits.
+
+    Safe to repeat: a corrected re-release updates the rows whose figures
+    changed and leaves the rest untouched. Returns the ScrapeLog status:
+    'success' or 'failed'.
+    """
+    month_name = MONTH_NAMES[target_month]
+    state_count = sum(1 for rec in records if rec['lga_id'] is None)
+    lga_count = len(records) - state_count
+    if state_count < 10:
+        _log_scrape(now, target_month, target_year, 'failed', 'nbs_excel',
+                    f'Excel found at {source_url} but only {state_count} states parsed (expected 37). Data not inserted.',
+                    run_key=run_key, content_hash=content_hash)
+        db.session.commit()
+        logger.warning(f'Scrape failed: only {state_count} states parsed for {month_name} {target_year}.')
+        return 'failed'
+
+    inserted, updated, unchanged = _upsert_allocations(records, target_year, target_month)
+    if inserted or updated:
+        refresh_rollups(target_year, target_month)
+        bump_data_version()
+    counts = f'{inserted} inserted, {updated} updated, {unchanged} unchanged'
+    _log_scrape(now, target_month, target_year, 'success', 'nbs_excel',
+                f'Successfully scraped {state_count} state and {lga_count} LGA records from {source_url} ({counts}).',
+                states_added=state_count, run_key=run_key, content_hash=content_hash,
+                rows=(inserted, updated, unchanged))
+    db.session.commit()
+    logger.info(f'Scrape success: {state_count} states, {lga_count} LGAs for {month_name} {target_year} ({counts}).')
+    return 'success'
+
 
-    return records
+def _no_progress(**fields):
+    pass
 
 
-def scrape_faac_data(target_month=None, target_year=None):
+def scrape_faac_data(target_month=None, target_year=None, progress=_no_progress):
     """Scrape the latest FAAC allocation data from NBS.
 
-    If target_month/year not specified, uses the previous month.
+    If target_month/year not specified, uses the previous month. A month
+    already in the database is upserted, so corrected re-releases are picked up.
+    progress is called with ScrapeJob fields (stage, rows_done, ...) as the
+    scrape moves along. Returns the ScrapeLog status. Needs an app context.
     """
-    with app.app_context():
-        now = datetime.utcnow()
-        if target_month is None or target_year is None:
-            # Target the previous month (data is released with a lag)
-            if now.month == 1:
-                target_month = 12
-                target_year = now.year - 1
-            else:
-                target_month = now.month - 1
-                target_year = now.year
-
-        month_name = MONTH_NAMES[target_month]
-
-        # Check if data already exists for this month
-        existing = FAACAllocation.query.filter_by(
-            month=target_month, year=target_year, lga_id=None
-        ).first()
-        if existing:
-            log = ScrapeLog(
-                run_date=now, target_month=target_month, target_year=target_year,
-                status='no_data', source=None, states_added=0,
-                message=f'Data for {month_name} {target_year} already exists in database.'
-            )
-            db.session.add(log)
+    now = datetime.utcnow()
+    if target_month is None or target_year is None:
+        # Target the previous month (data is released with a lag)
+        if now.month == 1:
+            target_month = 12
+            target_year = now.year - 1
+        else:
+            target_month = now.month - 1
+            target_year = now.year
+
+    month_name = MONTH_NAMES[target_month]
+
+    # Try NBS Excel download
+    progress(stage='downloading', months_total=1)
+    state_lookup = _build_state_lookup()
+    try:
+        content, source_url, sha256 = _download_nbs_excel(target_month, target_year)
+    except NBSUnavailable as e:
+        _log_scrape(now, target_month, target_year, 'failed', None,
+                    f'Could not reach NBS for {month_name} {target_year}: {e}')
+        db.session.commit()
+        logger.error(f'Scrape failed: {e}')
+        progress(months_done=1)
+        return 'failed'
+
+    if content:
+        if _already_ingested(sha256, target_month, target_year):
+            _log_unchanged(now, target_month, target_year, source_url, sha256)
+            progress(months_done=1)
+            return 'unchanged'
+        try:
+            progress(stage='parsing')
+            records = _parse_workbook_bytes(content, state_lookup, _build_lga_lookup())
+            progress(stage='inserting')
+            status = _ingest_month(records, target_month, target_year, source_url, now, content_hash=sha256)
+            progress(months_done=1, rows_done=len(records) if status == 'success' else 0)
+        except Exception as e:
+            db.session.rollback()
+            _log_scrape(now, target_month, target_year, 'failed', 'nbs_excel',
+                        f'Error parsing Excel from {source_url}: {str(e)}', content_hash=sha256)
             db.session.commit()
-            logger.info(f'Scrape skipped: data for {month_name} {target_year} already exists.')
+            logger.error(f'Scrape error: {e}')
+            status = 'failed'
+        return status
+
+    # NBS not available
+    _log_scrape(now, target_month, target_year, 'no_data', None,
+                f'No Excel file found for {month_name} {target_year} at NBS. Tried {len(NBS_URL_PATTERNS)} URL patterns.')
+    db.session.commit()
+    logger.info(f'Scrape no_data: no file found for {month_name} {target_year}.')
+    progress(months_done=1)
+    return 'no_data'
+
+
+def _month_range(start, end):
+    """Return [(year, month), ...] from start to end inclusive."""
+    months = []
+    year, month = start
+    while (year, month) <= end:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def backfill_faac_data(start, end, workers=4, progress=_no_progress):
+    """Scrape every month from start to end, given as (year, month), inclusive.
+
+    Workbooks are downloaded on a thread pool and parsed on a process pool;
+    each month is inserted and checkpointed in ScrapeLog (under a run key
+    derived from the range) as soon as its parse finishes, while other
+    months are still downloading. Re-running the same range skips months
+    already checkpointed or already in the database, so an interrupted
+    backfill resumes where it stopped; months that failed, including those
+    NBS could not be reached for, are not checkpointed and are retried. progress is called
+    as in scrape_faac_data, with months and rows counted across the range.
+
+    Returns {'success': n, 'no_data': n, 'unchanged': n, 'failed': n, 'skipped': n}.
+    Needs an app context.
+    """
+    run_key = f'backfill:{start[0]:04d}-{start[1]:02d}:{end[0]:04d}-{end[1]:02d}'
+    summary = {'success': 0, 'no_data': 0, 'unchanged': 0, 'failed': 0, 'skipped': 0}
+
+    checkpointed = set(db.session.query(ScrapeLog.target_year, ScrapeLog.target_month).filter(
+        ScrapeLog.run_key == run_key, ScrapeLog.status.in_(('success', 'no_data', 'unchanged'))
+    ).all())
+    existing = set(db.session.query(FAACAllocation.year, FAACAllocation.month).filter(
+        FAACAllocation.lga_id.is_(None)
+    ).distinct().all())
+
+    now = datetime.utcnow()
+    todo = []
+    for year, month in _month_range(start, end):
+        if (year, month) in checkpointed:
+            summary['skipped'] += 1
+        elif (year, month) in existing:
+            summary['skipped'] += 1
+            _log_scrape(now, month, year, 'no_data', None,
+                        f'Data for {MONTH_NAMES[month]} {year} already exists in database.',
+                        run_key=run_key)
+        else:
+            todo.append((year, month))
+    db.session.commit()
+    logger.info(f'Backfill {run_key}: {len(todo)} months to scrape, {summary["skipped"]} skipped.')
+    if not todo:
+        return summary
+
+    months_done = rows_done = 0
+    progress(stage='downloading', months_total=len(todo))
+
+    state_lookup = _build_state_lookup()
+    lga_lookup = _build_lga_lookup()
+    parse_workers = max(1, min(workers, os.cpu_count() or 1, len(todo)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='nbs-backfill') as downloads, \
+            ProcessPoolExecutor(max_workers=parse_workers,
+                                # fork would copy this process's threads' held locks
+                                mp_context=multiprocessing.get_context('spawn')) as parsers:
+        fetches = {downloads.submit(_download_nbs_excel, m, y): (y, m) for y, m in todo}
+        parses = {}
+        while fetches or parses:
+            done, _ = wait(set(fetches) | set(parses), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in fetches:
+                    year, month = fetches.pop(future)
+                    try:
+                        content, source_url, sha256 = future.result()
+                    except Exception as e:
+                        # Not checkpointed: a resumed run retries the month
+                        _log_scrape(datetime.utcnow(), month, year, 'failed', None,
+                                    f'Could not download {MONTH_NAMES[month]} {year} from NBS: {e}',
+                                    run_key=run_key)
+                        db.session.commit()
+                        logger.error(f'Backfill download error for {MONTH_NAMES[month]} {year}: {e}')
+                        status = 'failed'
+                    else:
+                        if content is None:
+                            _log_scrape(datetime.utcnow(), month, year, 'no_data', None,
+                                        f'No Excel file found for {MONTH_NAMES[month]} {year} at NBS. '
+                                        f'Tried {len(NBS_URL_PATTERNS)} URL patterns.', run_key=run_key)
+                            db.session.commit()
+                            status = 'no_data'
+                        elif _already_ingested(sha256, month, year):
+                            _log_unchanged(datetime.utcnow(), month, year, source_url, sha256, run_key=run_key)
+                            status = 'unchanged'
+                        else:
+                            future = parsers.submit(_parse_workbook_bytes, content, state_lookup, lga_lookup)
+                            parses[future] = (year, month, source_url, sha256)
+                            continue
+                else:
+                    year, month, source_url, sha256 = parses.pop(future)
+                    try:
+                        records = future.result()
+                        progress(stage='inserting')
+                        status = _ingest_month(records, month, year, source_url,
+                                               datetime.utcnow(), run_key=run_key, content_hash=sha256)
+                        if status == 'success':
+                            rows_done += len(records)
+                    except Exception as e:
+                        db.session.rollback()
+                        _log_scrape(datetime.utcnow(), month, year, 'failed', 'nbs_excel',
+                                    f'Error parsing Excel from {source_url}: {str(e)}',
+                                    run_key=run_key, content_hash=sha256)
+                        db.session.commit()
+                        logger.error(f'Backfill error for {MONTH_NAMES[month]} {year}: {e}')
+                        status = 'failed'
+                summary[status] += 1
+                months_done += 1
+                progress(stage='downloading' if fetches else 'parsing',
+                         months_done=months_done, rows_done=rows_done)
+
+    logger.info(f'Backfill {run_key} finished: {summary}')
+    return summary
+
+
+# ── Background jobs ─────────────────────────────────────────────────────────
+# Admin-triggered scrapes run here rather than inside the request, so a slow
+# NBS server never holds a web worker. One job runs at a time per process;
+# the rest wait in the executor's queue. Job state lives in scrape_jobs so
+# any worker can answer a status poll. The executor dies with its process,
+# so each process heartbeats the jobs it owns, and a queued or running job
+# whose heartbeat stops (restart, deploy, crash) is marked failed.
+
+job_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scrape-job')
+JOB_HEARTBEAT_SECONDS = 30
+JOB_STALE_SECONDS = 3 * JOB_HEARTBEAT_SECONDS
+UNFINISHED_JOB_STATUSES = ('queued', 'running')
+_job_owners = {}  # pid -> owner id
+
+
+def _job_owner():
+    """Return this process's job owner id; unique even when a pid is reused."""
+    return _job_owners.setdefault(os.getpid(), f'{_lease_holder()}:{uuid.uuid4().hex[:8]}')
+
+
+def _update_job(job_id, **fields):
+    """Write job fields on their own connection, visible to pollers at once."""
+    with db.engine.begin() as conn:
+        conn.execute(db.update(ScrapeJob).where(ScrapeJob.id == job_id).values(
+            heartbeat_at=datetime.utcnow(), **fields))
+
+
+def expire_orphaned_jobs():
+    """Mark queued or running jobs whose owner stopped heartbeating as failed.
+
+    Returns how many were expired. Needs an app context.
+    """
+    now = datetime.utcnow()
+    with db.engine.begin() as conn:
+        result = conn.execute(db.update(ScrapeJob).where(
+            ScrapeJob.status.in_(UNFINISHED_JOB_STATUSES),
+            db.or_(ScrapeJob.heartbeat_at.is_(None),
+                   ScrapeJob.heartbeat_at < now - timedelta(seconds=JOB_STALE_SECONDS)),
+        ).values(status='failed', stage=None, finished_at=now,
+                 result='Abandoned: the process running this job stopped (restart, deploy or crash).'))
+    if result.rowcount:
+        logger.warning(f'Marked {result.rowcount} abandoned scrape job(s) as failed.')
+    return result.rowcount
+
+
+def heartbeat_jobs(app):
+    """Scheduler job run in every process: keep this process's unfinished
+    jobs alive, then expire other processes' abandoned ones."""
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(db.update(ScrapeJob).where(
+                ScrapeJob.owner == _job_owner(), ScrapeJob.status.in_(UNFINISHED_JOB_STATUSES),
+            ).values(heartbeat_at=datetime.utcnow()))
+        expire_orphaned_jobs()
+
+
+def _run_job(app, job_id, func, args):
+    with app.app_context():
+        _update_job(job_id, status='running', started_at=datetime.utcnow())
+        try:
+            result = func(*args, progress=lambda **fields: _update_job(job_id, **fields))
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(f'Job {job_id} failed')
+            _update_job(job_id, status='failed', stage=None, result=str(e), finished_at=datetime.utcnow())
+        else:
+            _update_job(job_id, status='done', stage=None, result=json.dumps(result),
+                        finished_at=datetime.utcnow())
+
+
+def submit_job(kind, description, func, *args):
+    """Queue func(*args, progress=...) on the job executor and return its ScrapeJob."""
+    now = datetime.utcnow()
+    job = ScrapeJob(id=uuid.uuid4().hex, kind=kind, description=description, status='queued',
+                    created_at=now, owner=_job_owner(), heartbeat_at=now)
+    db.session.add(job)
+    db.session.commit()
+    job_executor.submit(_run_job, current_app._get_current_object(), job.id, func, args)
+    return job
+
+
+# ── Scheduler leadership ────────────────────────────────────────────────────
+# Every gunicorn worker imports this module and starts its own scheduler, so
+# scheduled jobs only run in the process holding the 'scheduler' lease. The
+# holder renews it every third of a term; if it dies, the lease runs out and
+# the next process to renew or fire a job takes over.
+
+SCHEDULER_LEASE_NAME = 'scheduler'
+SCHEDULER_LEASE_SECONDS = int(os.environ.get('SCHEDULER_LEASE_SECONDS', 90))
+
+
+def _lease_holder():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def acquire_scheduler_lease(name=SCHEDULER_LEASE_NAME, holder=None, seconds=SCHEDULER_LEASE_SECONDS):
+    """Take or renew a lease for holder (default: this process). True if held.
+
+    The conditional UPDATE only matches a lease this holder already has or
+    one that has expired, so at most one process wins it.
+    """
+    holder = holder or _lease_holder()
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=seconds)
+    try:
+        with db.engine.begin() as conn:
+            taken = conn.execute(db.update(SchedulerLease).where(
+                SchedulerLease.name == name,
+                db.or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now),
+            ).values(holder=holder, expires_at=expires_at)).rowcount
+        if taken:
+            return True
+        with db.engine.begin() as conn:
+            conn.execute(db.insert(SchedulerLease).values(name=name, holder=holder, expires_at=expires_at))
+        return True
+    except IntegrityError:
+        return False  # someone else holds it
+    except SQLAlchemyError as e:
+        logger.warning(f'Could not acquire scheduler lease {name!r}: {e}')
+        return False
+
+
+def release_scheduler_lease(name=SCHEDULER_LEASE_NAME, holder=None):
+    """Give up a lease so another process can take it without waiting for expiry."""
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(db.delete(SchedulerLease).where(
+                SchedulerLease.name == name, SchedulerLease.holder == (holder or _lease_holder())))
+    except SQLAlchemyError as e:
+        logger.warning(f'Could not release scheduler lease {name!r}: {e}')
+
+
+def run_as_leader(app, func, *args, lease=SCHEDULER_LEASE_NAME, seconds=SCHEDULER_LEASE_SECONDS):
+    """Scheduler entry point: call func(*args) in an app context, only if this
+    process holds the lease.
+
+    Returns True if func ran.
+    """
+    with app.app_context():
+        if not acquire_scheduler_lease(lease, seconds=seconds):
+            logger.info(f'Skipping {getattr(func, "__name__", func)}: another process holds the {lease!r} lease.')
+            return False
+        func(*args)
+        return True
+
+
+def _renew_scheduler_lease(app):
+    with app.app_context():
+        acquire_scheduler_lease()
+
+
+def _release_scheduler_lease_at_exit(app):
+    with app.app_context():
+        release_scheduler_lease()
+
+
+# ── Compare ─────────────────────────────────────────────────────────────────
+
+COMPARE_MAX_STATES = 37
+
+# Chart and card colours, cycled when more states are compared
+COMPARE_COLORS = [
+    '#1a5632', '#f0c040', '#3b82f6', '#c62828', '#7b1fa2', '#f57f17',
+    '#00838f', '#6d4c41', '#2e7d32', '#ad1457', '#455a64', '#9e9d24',
+]
+bp.add_app_template_global(COMPARE_COLORS, 'COMPARE_COLORS')
+
+
+def build_comparison(states):
+    """Build side-by-side series for a list of State objects.
+
+    Uses three queries whatever the number of states: all state-level
+    allocations, IGR totals grouped by state and LGA counts grouped by
+    state. Every state's series is aligned onto one shared month axis,
+    with None where a state has no row for a month.
+    """
+    if not states:
+        return {'periods': [], 'labels': [], 'compared': []}
+    ids = [s.id for s in states]
+
+    allocs = FAACAllocation.query.filter(
+        FAACAllocation.state_id.in_(ids), FAACAllocation.lga_id.is_(None)
+    ).order_by(FAACAllocation.year, FAACAllocation.month).all()
+
+    igr_totals = dict(db.session.query(IGR.state_id, db.func.sum(IGR.amount)).filter(
+        IGR.state_id.in_(ids)
+    ).group_by(IGR.state_id).all())
+    lga_counts = lga_counts_by_state(*ids)
+
+    periods = sorted({(a.year, a.month) for a in allocs})
+    position = {p: i for i, p in enumerate(periods)}
+    series = {state_id: [None] * len(periods) for state_id in ids}
+    for a in allocs:
+        series[a.state_id][position[(a.year, a.month)]] = a
+
+    compared = []
+    for s in states:
+        aligned = series[s.id]
+        present = [a for a in aligned if a is not None]
+        compared.append({
+            'state': s,
+            'allocations': aligned,
+            'latest': present[-1] if present else None,
+            'igr_total': igr_totals.get(s.id) or 0,
+            'lga_count': lga_counts.get(s.id, 0),
+            'net_values': [a.net_allocation if a else None for a in aligned],
+        })
+
+    return {
+        'periods': periods,
+        'labels': [f"{MONTH_NAMES[m][:3]} {y}" for y, m in periods],
+        'compared': compared,
+    }
+
+
+# ── Time series API ─────────────────────────────────────────────────────────
+# /api/state/<name>/series and /api/lga/<state>/<lga>/series return one
+# shared month axis plus one array per allocation field:
+#
+#   {"months": ["2024-01", ...], "series": {"net_allocation": [...], ...},
+#    "next_cursor": "2024-12" or null}
+#
+# Query parameters: fields (comma-separated, default all), from and to
+# (YYYY-MM, inclusive), limit (months per page) and cursor (the next_cursor
+# of the previous page). Rows are read as plain column tuples in month order
+# along the (entity, year, month) indexes.
+
+SERIES_FIELDS = ROLLUP_SUM_COLUMNS
+SERIES_DEFAULT_LIMIT = 120
+SERIES_MAX_LIMIT = 1200
+
+
+class SeriesRequestError(ValueError):
+    """A series request had an unknown field or a malformed month, limit or cursor."""
+
+
+def _parse_series_month(name, value):
+    try:
+        year, month = (int(part) for part in value.split('-'))
+    except ValueError:
+        raise SeriesRequestError(f'{name} must be in YYYY-MM form, not {value!r}.')
+    if not 1 <= month <= 12:
+        raise SeriesRequestError(f'{name} {value!r} has no month {month}.')
+    return year, month
+
+
+def parse_series_args(args):
+    """Validate series query parameters into (fields, start, end, cursor, limit)."""
+    fields = [f for f in args.get('fields', '').split(',') if f] or list(SERIES_FIELDS)
+    unknown = [f for f in fields if f not in SERIES_FIELDS]
+    if unknown:
+        raise SeriesRequestError(f'Unknown field(s) {", ".join(unknown)}; '
+                                 f'choose from {", ".join(SERIES_FIELDS)}.')
+    start, end, cursor = (_parse_series_month(name, args[name]) if args.get(name) else None
+                          for name in ('from', 'to', 'cursor'))
+    limit = args.get('limit')
+    try:
+        limit = int(limit) if limit else SERIES_DEFAULT_LIMIT
+    except ValueError:
+        raise SeriesRequestError(f'limit must be a whole number, not {limit!r}.') from None
+    if not 1 <= limit <= SERIES_MAX_LIMIT:
+        raise SeriesRequestError(f'limit must be between 1 and {SERIES_MAX_LIMIT}.')
+    return list(dict.fromkeys(fields)), start, end, cursor, limit
+
+
+def build_series(criteria, fields, start=None, end=None, cursor=None, limit=SERIES_DEFAULT_LIMIT):
+    """Return one page of the columnar series for allocations matching criteria.
+
+    Pages are keyed on the last month returned, so a page is one index range
+    scan however deep into the history it starts.
+    """
+    period = db.tuple_(FAACAllocation.year, FAACAllocation.month)
+    if start:
+        criteria = (*criteria, period >= db.tuple_(*start))
+    if end:
+        criteria = (*criteria, period <= db.tuple_(*end))
+    if cursor:
+        criteria = (*criteria, period > db.tuple_(*cursor))
+
+    rows = db.session.query(
+        FAACAllocation.year, FAACAllocation.month, *(getattr(FAACAllocation, f) for f in fields)
+    ).filter(*criteria).order_by(FAACAllocation.year, FAACAllocation.month).limit(limit + 1).all()
+
+    page = rows[:limit]
+    months = [f'{year:04d}-{month:02d}' for year, month, *_ in page]
+    columns = list(zip(*(values for _, _, *values in page))) or [()] * len(fields)
+    return {
+        'fields': fields,
+        'months': months,
+        'series': {f: list(column) for f, column in zip(fields, columns)},
+        'next_cursor': months[-1] if len(rows) > limit else None,
+    }
+
+
+# ── Bulk export ─────────────────────────────────────────────────────────────
+# Every allocation or IGR row, joined with state and LGA names, streamed as
+# CSV or NDJSON. Rows are fetched EXPORT_BATCH_SIZE at a time and encoded
+# (and gzipped) in chunks as they arrive, so memory does not grow with the
+# size of the dataset.
+
+EXPORT_DATASETS = ('allocations', 'igr')
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_LEVELS = ('state', 'lga')
+EXPORT_MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+EXPORT_BATCH_SIZE = 2000
+
+
+class ExportRequestError(ValueError):
+    """An export request named an unknown dataset, format, zone or level."""
+
+
+def export_query(dataset, start_year=None, end_year=None, zone=None, level=None):
+    """Return (column names, column-projection query) for an export.
+
+    IGR is reported per state, so level='lga' exports no IGR rows.
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise ExportRequestError(f'Unknown dataset {dataset!r}; choose from {", ".join(EXPORT_DATASETS)}.')
+    if level not in (None, *EXPORT_LEVELS):
+        raise ExportRequestError(f'Unknown level {level!r}; choose from {", ".join(EXPORT_LEVELS)}.')
+    if zone is not None:
+        zone = next((z for z in GEO_ZONES if z.lower() == zone.lower()), None) or zone
+        if zone not in GEO_ZONES:
+            raise ExportRequestError(f'Unknown zone {zone!r}; choose from {", ".join(GEO_ZONES)}.')
+
+    if dataset == 'allocations':
+        model = FAACAllocation
+        columns = ['state', 'state_code', 'geo_zone', 'lga', 'year', 'month', *ROLLUP_SUM_COLUMNS]
+        query = db.session.query(
+            State.name, State.code, State.geo_zone, LGA.name, FAACAllocation.year, FAACAllocation.month,
+            *(getattr(FAACAllocation, c) for c in ROLLUP_SUM_COLUMNS)
+        ).join(State, FAACAllocation.state_id == State.id).outerjoin(LGA, FAACAllocation.lga_id == LGA.id)
+        if level == 'state':
+            query = query.filter(FAACAllocation.lga_id.is_(None))
+        elif level == 'lga':
+            query = query.filter(FAACAllocation.lga_id.isnot(None))
+    else:
+        model = IGR
+        columns = ['state', 'state_code', 'geo_zone', 'year', 'quarter', 'amount']
+        query = db.session.query(
+            State.name, State.code, State.geo_zone, IGR.year, IGR.quarter, IGR.amount
+        ).join(State, IGR.state_id == State.id)
+        if level == 'lga':
+            query = query.filter(db.false())
+
+    if start_year is not None:
+        query = query.filter(model.year >= start_year)
+    if end_year is not None:
+        query = query.filter(model.year <= end_year)
+    if zone is not None:
+        query = query.filter(State.geo_zone == zone)
+    return columns, query.order_by(model.id).yield_per(EXPORT_BATCH_SIZE)
+
+
+def _csv_chunks(columns, rows):
+    buf = StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for i, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode()
+
+
+def _ndjson_chunks(columns, rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, row)), separators=(',', ':')))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield ('\n'.join(lines) + '\n').encode()
+            lines.clear()
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode()
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_export(dataset, fmt='csv', compress=False, **filters):
+    """Yield the encoded export as byte chunks. Raises ExportRequestError for bad arguments."""
+    if fmt not in EXPORT_FORMATS:
+        raise ExportRequestError(f'Unknown format {fmt!r}; choose from {", ".join(EXPORT_FORMATS)}.')
+    columns, rows = export_query(dataset, **filters)
+    chunks = (_csv_chunks if fmt == 'csv' else _ndjson_chunks)(columns, rows)
+    return _gzip_chunks(chunks) if compress else chunks
+
+
+# ── Analytics ───────────────────────────────────────────────────────────────
+# Net allocations for every state and every LGA are held as dense NumPy
+# arrays indexed by (entity, month), one per level, built once per data
+# version. Rankings, growth, percentiles and zone shares for a month are then
+# a few vectorised operations over a column, whatever the number of entities.
+
+ANALYTICS_LEVELS = ('state', 'lga')
+
+
+class AnalyticsRequestError(ValueError):
+    """An analytics request named an unknown level, zone or a malformed month."""
+
+
+class AnalyticsPanel:
+    """Net allocations of one level as an (entity, month) array, NaN where missing."""
+
+    def __init__(self, names, state_names, zones, values):
+        import numpy as np
+        self.names = names
+        self.state_names = state_names
+        self.zones = zones
+        self.zone_names = sorted(set(zones))
+        position = {z: i for i, z in enumerate(self.zone_names)}
+        self.zone_idx = np.array([position[z] for z in zones], dtype=np.int64)
+        self.values = values
+        self.rows = {}  # lower-case state name, or (state, lga) pair -> row
+
+    @staticmethod
+    def _ranks(values, groups):
+        """Rank values within groups, 1 = largest; ties share the better rank."""
+        import numpy as np
+        order = np.lexsort((-values, groups))
+        v, grp = values[order], groups[order]
+        n = len(v)
+        idx = np.arange(n)
+        new_group = np.ones(n, dtype=bool)
+        new_group[1:] = grp[1:] != grp[:-1]
+        new_run = new_group.copy()
+        new_run[1:] |= v[1:] != v[:-1]
+        group_start = np.maximum.accumulate(np.where(new_group, idx, 0))
+        run_start = np.maximum.accumulate(np.where(new_run, idx, 0))
+        ranks = np.empty(n)
+        ranks[order] = run_start - group_start + 1
+        return ranks
+
+    def metrics(self, t):
+        """Return a dict of per-entity arrays for month position t."""
+        import numpy as np
+        v = self.values[:, t]
+        present = ~np.isnan(v)
+        zones = self.zone_idx
+        # Missing entities go into their own group so they don't take up ranks.
+        groups = np.where(present, zones, -1)
+        national = np.where(present, 0, -1)
+        filled = np.where(present, v, 0.0)
+        count = int(present.sum())
+        zone_counts = np.bincount(zones[present], minlength=len(self.zone_names))
+        zone_totals = np.bincount(zones[present], weights=v[present], minlength=len(self.zone_names))
+
+        rank = np.where(present, self._ranks(filled, national), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mom = v / self.values[:, t - 1] - 1 if t >= 1 else np.full_like(v, np.nan)
+            yoy = v / self.values[:, t - 12] - 1 if t >= 12 else np.full_like(v, np.nan)
+            zone_share = v / zone_totals[zones]
+        return {
+            'value': v,
+            'count': count,
+            'rank': rank,
+            'zone_rank': np.where(present, self._ranks(filled, groups), np.nan),
+            'zone_count': zone_counts[zones],
+            'percentile': 100.0 * (count - rank + 1) / count if count else rank,
+            'mom_growth': np.where(np.isfinite(mom), mom, np.nan),
+            'yoy_growth': np.where(np.isfinite(yoy), yoy, np.nan),
+            'zone_share': zone_share,
+        }
+
+
+def _json_column(values, cast=float):
+    """Convert a NumPy array to a JSON-safe list, None for NaN."""
+    return [None if x != x else cast(x) for x in values.tolist()]
+
+
+class AnalyticsEngine:
+    """In-memory analytics over every state and LGA for one data version.
+
+    build() loads the allocations with three column-projection queries;
+    after that no metric touches the database. Metrics for a (level, month)
+    are computed for all entities at once and kept until the next version.
+    """
+
+    def __init__(self, version, first_period, n_months, panels):
+        self.version = version
+        self.first_period = first_period  # year * 12 + month - 1 of months[0]
+        self.months = [((first_period + i) // 12, (first_period + i) % 12 + 1) for i in range(n_months)]
+        self.panels = panels
+        self._metrics = {}
+
+    @classmethod
+    def build(cls, version):
+        import numpy as np
+        states = db.session.query(State.id, State.name, State.geo_zone).order_by(State.name).all()
+        lgas = db.session.query(LGA.id, LGA.name, LGA.state_id).order_by(LGA.state_id, LGA.name).all()
+        # Plain tuples: NumPy probes Row objects attribute by attribute, ten times slower.
+        # Amounts are loaded as raw kobo and converted to naira in one array operation.
+        rows = np.array([tuple(r) for r in db.session.query(
+            FAACAllocation.state_id, db.func.coalesce(FAACAllocation.lga_id, 0),
+            FAACAllocation.year * 12 + FAACAllocation.month - 1, kobo(FAACAllocation.net_allocation)
+        )], dtype=np.float64).reshape(-1, 4)
+        rows[:, 3] /= KOBO_PER_NAIRA
+
+        periods = rows[:, 2].astype(np.int64)
+        first = int(periods.min()) if len(rows) else 0
+        n_months = int(periods.max()) - first + 1 if len(rows) else 0
+        is_lga = rows[:, 1] > 0
+
+        state_info = {sid: (name, zone) for sid, name, zone in states}
+        entities = {
+            'state': [(sid, name, name, zone) for sid, name, zone in states],
+            'lga': [(lid, name, *state_info[sid]) for lid, name, sid in lgas],
+        }
+        panels = {}
+        for level, id_col, mask in (('state', 0, ~is_lga), ('lga', 1, is_lga)):
+            ids, names, state_names, zones = (list(col) for col in zip(*entities[level])) \
+                if entities[level] else ([], [], [], [])
+            ids = np.array(ids, dtype=np.int64)
+            entity_ids = rows[mask, id_col].astype(np.int64)
+            lookup = np.full(max(ids.max(initial=0), entity_ids.max(initial=0)) + 1, -1, dtype=np.int64)
+            lookup[ids] = np.arange(len(ids))
+            row_idx = lookup[entity_ids]
+            keep = row_idx >= 0
+            values = np.full((len(ids), n_months), np.nan)
+            values[row_idx[keep], periods[mask][keep] - first] = rows[mask, 3][keep]
+
+            panel = AnalyticsPanel(names, state_names, zones, values)
+            for row, (name, state_name) in enumerate(zip(names, state_names)):
+                key = name.lower() if level == 'state' else (state_name.lower(), name.lower())
+                panel.rows[key] = row
+            panels[level] = panel
+        return cls(version, first, n_months, panels)
+
+    def month_position(self, year, month):
+        t = year * 12 + month - 1 - self.first_period
+        return t if 0 <= t < len(self.months) else None
+
+    def latest_position(self, level, row=None):
+        """Position of the latest month with data for the level (or one entity)."""
+        import numpy as np
+        values = self.panels[level].values
+        present = ~np.isnan(values[row]) if row is not None else ~np.isnan(values).all(axis=0)
+        months = np.flatnonzero(present)
+        return int(months[-1]) if len(months) else None
+
+    def metrics(self, level, t):
+        key = (level, t)
+        if key not in self._metrics:
+            self._metrics[key] = self.panels[level].metrics(t)
+        return self._metrics[key]
+
+    def _entities(self, level, rows, m):
+        """Metric dicts for the entity rows, converted a column at a time."""
+        import numpy as np
+        panel = self.panels[level]
+        columns = {
+            'net_allocation': _json_column(m['value'][rows]),
+            'rank': _json_column(m['rank'][rows], int),
+            'zone_rank': _json_column(m['zone_rank'][rows], int),
+            'zone_count': m['zone_count'][rows].tolist(),
+            'percentile': _json_column(np.round(m['percentile'][rows], 2)),
+            'mom_growth': _json_column(np.round(m['mom_growth'][rows], 6)),
+            'yoy_growth': _json_column(np.round(m['yoy_growth'][rows], 6)),
+            'zone_share': _json_column(np.round(m['zone_share'][rows], 6)),
+        }
+        entities = []
+        for j, i in enumerate(rows.tolist()):
+            entity = {'name': panel.names[i], 'geo_zone': panel.zones[i]}
+            if level == 'lga':
+                entity['state'] = panel.state_names[i]
+            entity.update((key, values[j]) for key, values in columns.items())
+            entities.append(entity)
+        return entities
+
+    def _month_label(self, t):
+        year, month = self.months[t]
+        return f'{year:04d}-{month:02d}'
+
+    def rankings(self, level, period=None, zone=None, limit=None):
+        """Every entity with data for the month (default latest), best first."""
+        import numpy as np
+        t = self.month_position(*period) if period else self.latest_position(level)
+        if t is None:
+            return {'level': level, 'month': None, 'count': 0, 'entities': []}
+        panel = self.panels[level]
+        m = self.metrics(level, t)
+        rank = m['rank']
+        rows = np.flatnonzero(~np.isnan(rank))
+        if zone is not None:
+            zone_idx = panel.zone_names.index(zone) if zone in panel.zone_names else -1
+            rows = rows[panel.zone_idx[rows] == zone_idx]
+        rows = rows[np.argsort(rank[rows], kind='stable')][:limit]
+        return {'level': level, 'month': self._month_label(t), 'count': m['count'],
+                'entities': self._entities(level, rows, m)}
+
+    def entity(self, level, key, period=None):
+        """Metrics for one entity for the month (default its latest) plus growth columns.
+
+        key is a state name, or a (state name, LGA name) pair. Returns None
+        if the entity is unknown.
+        """
+        import numpy as np
+        key = key.lower() if level == 'state' else tuple(k.lower() for k in key)
+        i = self.panels[level].rows.get(key)
+        if i is None:
+            return None
+        t = self.month_position(*period) if period else self.latest_position(level, i)
+        result = {'month': None, 'count': 0}
+        if t is not None:
+            m = self.metrics(level, t)
+            result = {**self._entities(level, np.array([i]), m)[0],
+                      'month': self._month_label(t), 'count': m['count']}
+
+        values = self.panels[level].values[i]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mom = np.concatenate(([np.nan], values[1:] / values[:-1] - 1))
+            yoy = np.concatenate((np.full(min(12, len(values)), np.nan), values[12:] / values[:-12] - 1))
+        present = np.flatnonzero(~np.isnan(values))
+        result['growth'] = {
+            'months': [self._month_label(t) for t in present],
+            'mom_growth': _json_column(np.round(np.where(np.isfinite(mom), mom, np.nan)[present], 6)),
+            'yoy_growth': _json_column(np.round(np.where(np.isfinite(yoy), yoy, np.nan)[present], 6)),
+        }
+        return result
+
+
+_analytics = None
+_analytics_lock = threading.Lock()
+_analytics_rebuilding = False
+
+
+def get_analytics():
+    """Return the analytics engine, or None until this process has built one.
+
+    When the data version has moved on, a rebuild starts on a background
+    thread and requests keep the previous engine until it is ready, so no
+    request pays for the scan. Those responses are marked stale: they are
+    neither cached nor given the new version's validators.
+    """
+    engine = _analytics
+    if engine is None or engine.version != get_data_version():
+        _start_analytics_rebuild()
+        g._stale_response = True
+    return engine
+
+
+def build_analytics():
+    """Build the engine for the current data version in this thread; for startup."""
+    global _analytics
+    _analytics = AnalyticsEngine.build(get_data_version())
+    return _analytics
+
+
+def _start_analytics_rebuild():
+    global _analytics_rebuilding
+    with _analytics_lock:
+        if _analytics_rebuilding:
             return
+        _analytics_rebuilding = True
+    threading.Thread(target=_rebuild_analytics, args=(current_app._get_current_object(),),
+                     name='analytics-rebuild', daemon=True).start()
 
-        # Try NBS Excel download
-        state_lookup = _build_state_lookup()
-        wb, source_url = _try_download_nbs_excel(month_name, target_year)
 
-        if wb:
-            try:
-                records = _parse_excel_data(wb, state_lookup)
-                wb.close()
-
-                if len(records) < 10:
-                    log = ScrapeLog(
-                        run_date=now, target_month=target_month, target_year=target_year,
-                        status='failed', source='nbs_excel', states_added=0,
-                        message=f'Excel found at {source_url} but only {len(records)} states parsed (expected 37). Data not inserted.'
-                    )
-                    db.session.add(log)
-                    db.session.commit()
-                    logger.warning(f'Scrape failed: only {len(records)} states parsed.')
-                    return
-
-                # Insert records
-                for rec in records:
-                    gross = rec['statutory'] + rec['vat']
-                    alloc = FAACAllocation(
-                        state_id=rec['state_id'], lga_id=None,
-                        month=target_month, year=target_year,
-                        statutory_allocation=rec['statutory'],
-                        vat_allocation=rec['vat'],
-                        total_gross=gross,
-                        deductions=rec['deductions'],
-                        net_allocation=rec['net'],
-                    )
-                    db.session.add(alloc)
-
-                log = ScrapeLog(
-                    run_date=now, target_month=target_month, target_year=target_year,
-                    status='success', source='nbs_excel', states_added=len(records),
-                    message=f'Successfully scraped {len(records)} state records from {source_url}.'
-                )
-                db.session.add(log)
-                db.session.commit()
-                logger.info(f'Scrape success: {len(records)} states for {month_name} {target_year}.')
-                return
+def _rebuild_analytics(app):
+    global _analytics_rebuilding
+    try:
+        with app.app_context():
+            build_analytics()
+    except Exception:
+        logger.exception('Rebuilding the analytics engine failed')
+    finally:
+        _analytics_rebuilding = False
 
-            except Exception as e:
-                db.session.rollback()
-                log = ScrapeLog(
-                    run_date=now, target_month=target_month, target_year=target_year,
-                    status='failed', source='nbs_excel', states_added=0,
-                    message=f'Error parsing Excel from {source_url}: {str(e)}'
-                )
-                db.session.add(log)
-                db.session.commit()
-                logger.error(f'Scrape error: {e}')
-                return
-
-        # NBS not available
-        log = ScrapeLog(
-            run_date=now, target_month=target_month, target_year=target_year,
-            status='no_data', source=None, states_added=0,
-            message=f'No Excel file found for {month_name} {target_year} at NBS. Tried {len(NBS_URL_PATTERNS)} URL patterns.'
-        )
-        db.session.add(log)
-        db.session.commit()
-        logger.info(f'Scrape no_data: no file found for {month_name} {target_year}.')
+
+def analytics_unavailable():
+    """503 for analytics requests a process serves before its first engine is built."""
+    resp = jsonify({'error': 'Analytics are still being built; retry shortly.'})
+    resp.status_code = 503
+    resp.headers['Retry-After'] = '5'
+    return resp
+
+
+def parse_analytics_args(args):
+    """Validate analytics query parameters into (level, period, zone, limit)."""
+    level = args.get('level', 'state')
+    if level not in ANALYTICS_LEVELS:
+        raise AnalyticsRequestError(f'Unknown level {level!r}; choose from {", ".join(ANALYTICS_LEVELS)}.')
+    try:
+        period = _parse_series_month('month', args['month']) if args.get('month') else None
+    except SeriesRequestError as e:
+        raise AnalyticsRequestError(str(e)) from None
+    zone = args.get('zone') or None
+    if zone is not None:
+        zone = next((z for z in GEO_ZONES if z.lower() == zone.lower()), None) or zone
+        if zone not in GEO_ZONES:
+            raise AnalyticsRequestError(f'Unknown zone {zone!r}; choose from {", ".join(GEO_ZONES)}.')
+    limit = args.get('limit')
+    try:
+        limit = int(limit) if limit else None
+    except ValueError:
+        raise AnalyticsRequestError(f'limit must be a whole number, not {limit!r}.') from None
+    if limit is not None and limit < 1:
+        raise AnalyticsRequestError('limit must be at least 1.')
+    return level, period, zone, limit
 
 
 # ── Routes ──────────────────────────────────────────────────────────────────
 
-@app.route('/terms')
+@bp.route('/terms')
 def terms():
     return render_template('terms.html')
 
 
-@app.route('/')
+@bp.route('/')
+@conditional_response
+@cached_response
+@query_budget(6)
 def index():
     states = State.query.order_by(State.name).all()
 
     # Latest month summary
-    latest = db.session.query(
-        FAACAllocation.year, FAACAllocation.month
-    ).filter(
-        FAACAllocation.lga_id.is_(None)
-    ).order_by(
-        FAACAllocation.year.desc(), FAACAllocation.month.desc()
+    latest = NationalMonthlyTotal.query.order_by(
+        NationalMonthlyTotal.year.desc(), NationalMonthlyTotal.month.desc()
     ).first()
 
     summary = []
+    zone_totals = {}
     if latest:
-        top_states = FAACAllocation.query.filter_by(
+        top_states = FAACAllocation.query.options(db.joinedload(FAACAllocation.state)).filter_by(
             year=latest.year, month=latest.month, lga_id=None
         ).order_by(FAACAllocation.net_allocation.desc()).limit(5).all()
         summary = top_states
+        zone_totals = {z.geo_zone: z for z in ZoneMonthlyTotal.query.filter_by(
+            year=latest.year, month=latest.month
+        )}
 
     zones = {}
     for s in states:
         zones.setdefault(s.geo_zone, []).append(s)
 
     return render_template('index.html',
-                           states=states, zones=zones,
+                           states=states, zones=zones, zone_totals=zone_totals,
+                           lga_counts=lga_counts_by_state(),
                            summary=summary, latest=latest)
 
 
-@app.route('/api/search')
+@bp.route('/api/search')
+@conditional_response
+@query_budget(3)
 def api_search():
     q = request.args.get('q', '').strip()
     if len(q) < 2:
         return jsonify([])
+    return jsonify(get_search_index().search(q))
 
-    results = []
-    states = State.query.filter(State.name.ilike(f'%{q}%')).limit(5).all()
-    for s in states:
-        results.append({'type': 'state', 'name': s.name, 'url': url_for('state_detail', name=s.name)})
-
-    lgas = LGA.query.filter(LGA.name.ilike(f'%{q}%')).limit(5).all()
-    for lg in lgas:
-        results.append({'type': 'lga', 'name': f'{lg.name} ({lg.state.name})',
-                        'url': url_for('lga_detail', state_name=lg.state.name, lga_name=lg.name)})
 
-    return jsonify(results)
-
-
-@app.route('/state/<name>')
+@bp.route('/state/<name>')
+@conditional_response
+@cached_response
+@query_budget(8)
 def state_detail(name):
     state = State.query.filter(State.name.ilike(name)).first_or_404()
 
@@ -408,16 +2441,12 @@ def state_detail(name):
     igr_data = IGR.query.filter_by(state_id=state.id).order_by(IGR.year.desc(), IGR.quarter).all()
 
     lga_allocations = []
-    latest = db.session.query(
-        FAACAllocation.year, FAACAllocation.month
-    ).filter(
-        FAACAllocation.state_id == state.id, FAACAllocation.lga_id.isnot(None)
-    ).order_by(
-        FAACAllocation.year.desc(), FAACAllocation.month.desc()
+    latest = StateLGAMonthlyTotal.query.filter_by(state_id=state.id).order_by(
+        StateLGAMonthlyTotal.year.desc(), StateLGAMonthlyTotal.month.desc()
     ).first()
 
     if latest:
-        lga_allocations = FAACAllocation.query.filter(
+        lga_allocations = FAACAllocation.query.options(db.joinedload(FAACAllocation.lga)).filter(
             FAACAllocation.state_id == state.id,
             FAACAllocation.lga_id.isnot(None),
             FAACAllocation.year == latest.year,
@@ -429,6 +2458,8 @@ def state_detail(name):
     ).distinct().order_by(FAACAllocation.year.desc()).all()
     available_years = [y[0] for y in available_years]
 
+    analytics = get_analytics()
+
     # Chart data
     chart_labels = [f"{MONTH_NAMES[a.month][:3]} {a.year}" for a in reversed(allocations)]
     chart_statutory = [a.statutory_allocation for a in reversed(allocations)]
@@ -437,8 +2468,10 @@ def state_detail(name):
 
     return render_template('state.html',
                            state=state, allocations=allocations,
+                           lga_count=lga_counts_by_state(state.id).get(state.id, 0),
                            igr_data=igr_data, lga_allocations=lga_allocations,
                            latest_lga=latest,
+                           analytics=analytics and analytics.entity('state', state.name),
                            available_years=available_years,
                            filter_year=year, filter_month=month,
                            chart_labels=chart_labels,
@@ -447,98 +2480,222 @@ def state_detail(name):
                            chart_net=chart_net)
 
 
-@app.route('/lga/<state_name>/<lga_name>')
+# path: some LGA names contain a slash, e.g. Obio/Akpor
+@bp.route('/lga/<state_name>/<path:lga_name>')
+@conditional_response
+@cached_response
+@query_budget(4)
 def lga_detail(state_name, lga_name):
-    state = State.query.filter(State.name.ilike(state_name)).first_or_404()
-    lga = LGA.query.filter(LGA.name.ilike(lga_name), LGA.state_id == state.id).first_or_404()
+    state = State.query.options(db.selectinload(State.lgas)).filter(
+        State.name.ilike(state_name)
+    ).first_or_404()
+    # The state's LGAs are loaded for the "Other LGAs" list anyway.
+    lga = next((lg for lg in state.lgas if lg.name.lower() == lga_name.lower()), None)
+    if lga is None:
+        abort(404)
 
     allocations = FAACAllocation.query.filter_by(lga_id=lga.id).order_by(
         FAACAllocation.year.desc(), FAACAllocation.month.desc()
     ).all()
 
+    analytics = get_analytics()
     chart_labels = [f"{MONTH_NAMES[a.month][:3]} {a.year}" for a in reversed(allocations)]
     chart_net = [a.net_allocation for a in reversed(allocations)]
 
     return render_template('lga.html', state=state, lga=lga,
                            allocations=allocations,
+                           analytics=analytics and analytics.entity('lga', (state.name, lga.name)),
                            chart_labels=chart_labels,
                            chart_net=chart_net)
 
 
-@app.route('/compare', methods=['GET'])
+@bp.route('/api/state/<name>/series')
+@conditional_response
+@cached_response
+@query_budget(3)
+def api_state_series(name):
+    try:
+        params = parse_series_args(request.args)
+    except SeriesRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    state = db.session.query(State.id, State.name, State.code).filter(State.name.ilike(name)).first()
+    if state is None:
+        return jsonify({'error': f'No state named {name!r}.'}), 404
+    payload = build_series((FAACAllocation.state_id == state.id, FAACAllocation.lga_id.is_(None)), *params)
+    return jsonify({'type': 'state', 'state': state.name, 'code': state.code, **payload})
+
+
+@bp.route('/api/lga/<state_name>/<path:lga_name>/series')
+@conditional_response
+@cached_response
+@query_budget(3)
+def api_lga_series(state_name, lga_name):
+    try:
+        params = parse_series_args(request.args)
+    except SeriesRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    # Resolve the state first so the LGA is found through ix_lgas_state_name.
+    state_id = db.session.query(State.id).filter(State.name.ilike(state_name)).scalar_subquery()
+    lga = db.session.query(LGA.id, LGA.name, State.name.label('state_name')).join(
+        State, LGA.state_id == State.id
+    ).filter(
+        LGA.state_id == state_id, db.func.lower(LGA.name) == lga_name.lower()
+    ).first()
+    if lga is None:
+        return jsonify({'error': f'No LGA named {lga_name!r} in {state_name!r}.'}), 404
+    payload = build_series((FAACAllocation.lga_id == lga.id,), *params)
+    return jsonify({'type': 'lga', 'state': lga.state_name, 'lga': lga.name, **payload})
+
+
+def _export_content_coding():
+    return 'gzip' if 'gzip' in request.accept_encodings else 'identity'
+
+
+@bp.route('/api/export/<dataset>')
+@conditional_response(content_coding=_export_content_coding)
+@query_budget(2)
+def api_export(dataset):
+    fmt = request.args.get('format', 'csv')
+    compress = _export_content_coding() == 'gzip'
+    try:
+        chunks = iter_export(dataset, fmt, compress,
+                             start_year=request.args.get('start_year', type=int),
+                             end_year=request.args.get('end_year', type=int),
+                             zone=request.args.get('zone') or None,
+                             level=request.args.get('level') or None)
+    except ExportRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    resp = current_app.response_class(stream_with_context(chunks), mimetype=EXPORT_MIMETYPES[fmt])
+    resp.headers['Content-Disposition'] = f'attachment; filename=faac-{dataset}.{fmt}'
+    if compress:
+        resp.headers['Content-Encoding'] = 'gzip'
+    resp.vary.add('Accept-Encoding')
+    return resp
+
+
+@bp.route('/api/analytics/rankings')
+@conditional_response
+@cached_response
+@query_budget(1)
+def api_analytics_rankings():
+    try:
+        level, period, zone, limit = parse_analytics_args(request.args)
+    except AnalyticsRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    engine = get_analytics()
+    if engine is None:
+        return analytics_unavailable()
+    return jsonify(engine.rankings(level, period, zone, limit))
+
+
+@bp.route('/api/analytics/state/<name>')
+@conditional_response
+@cached_response
+@query_budget(1)
+def api_analytics_state(name):
+    try:
+        _, period, _, _ = parse_analytics_args(request.args)
+    except AnalyticsRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    engine = get_analytics()
+    if engine is None:
+        return analytics_unavailable()
+    result = engine.entity('state', name, period)
+    if result is None:
+        return jsonify({'error': f'No state named {name!r}.'}), 404
+    return jsonify(result)
+
+
+@bp.route('/api/analytics/lga/<state_name>/<path:lga_name>')
+@conditional_response
+@cached_response
+@query_budget(1)
+def api_analytics_lga(state_name, lga_name):
+    try:
+        _, period, _, _ = parse_analytics_args(request.args)
+    except AnalyticsRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    engine = get_analytics()
+    if engine is None:
+        return analytics_unavailable()
+    result = engine.entity('lga', (state_name, lga_name), period)
+    if result is None:
+        return jsonify({'error': f'No LGA named {lga_name!r} in {state_name!r}.'}), 404
+    return jsonify(result)
+
+
+@bp.route('/compare', methods=['GET'])
+@conditional_response
+@cached_response
+@query_budget(5)
 def compare():
     states = State.query.order_by(State.name).all()
-    selected_names = request.args.getlist('states')
-
-    compared = []
-    for name in selected_names[:3]:
-        s = State.query.filter(State.name.ilike(name)).first()
-        if s:
-            allocs = FAACAllocation.query.filter_by(
-                state_id=s.id, lga_id=None
-            ).order_by(FAACAllocation.year, FAACAllocation.month).all()
+    selected_names = [n for n in request.args.getlist('states') if n]
+    selected_zone = request.args.get('zone', '')
 
-            igr_total = db.session.query(db.func.sum(IGR.amount)).filter_by(
-                state_id=s.id
-            ).scalar() or 0
+    # Resolve names and zone against the states already loaded for the selector.
+    by_name = {s.name.lower(): s for s in states}
+    selected = [by_name[n.lower()] for n in selected_names if n.lower() in by_name]
+    selected += [s for s in states if s.geo_zone == selected_zone]
+    selected = list(dict.fromkeys(selected))[:COMPARE_MAX_STATES]
 
-            compared.append({
-                'state': s,
-                'allocations': allocs,
-                'igr_total': igr_total,
-                'labels': [f"{MONTH_NAMES[a.month][:3]} {a.year}" for a in allocs],
-                'net_values': [a.net_allocation for a in allocs],
-            })
+    comparison = build_comparison(selected)
 
-    return render_template('compare.html', states=states, compared=compared,
-                           selected_names=selected_names)
+    return render_template('compare.html', states=states,
+                           compared=comparison['compared'],
+                           labels=comparison['labels'],
+                           selected_names=selected_names,
+                           selected_zone=selected_zone)
 
 
 # ── Admin ───────────────────────────────────────────────────────────────────
 
-@app.route('/admin/login', methods=['GET', 'POST'])
+@bp.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
     if request.method == 'POST':
-        if request.form.get('password') == app.config['ADMIN_PASSWORD']:
+        if request.form.get('password') == current_app.config['ADMIN_PASSWORD']:
             session['admin'] = True
             flash('Logged in successfully.', 'success')
-            return redirect(url_for('admin_dashboard'))
+            return redirect(url_for('main.admin_dashboard'))
         flash('Incorrect password.', 'danger')
     return render_template('admin_login.html')
 
 
-@app.route('/admin/logout')
+@bp.route('/admin/logout')
 def admin_logout():
     session.pop('admin', None)
     flash('Logged out.', 'info')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
 
-@app.route('/admin')
+@bp.route('/admin')
 @login_required
 def admin_dashboard():
     states = State.query.order_by(State.name).all()
     scrape_logs = ScrapeLog.query.order_by(ScrapeLog.run_date.desc()).limit(20).all()
+    jobs = ScrapeJob.query.order_by(ScrapeJob.created_at.desc()).limit(5).all()
     try:
         next_run = scheduler.get_job('faac_monthly_scrape')
         next_run_time = next_run.next_run_time.strftime('%d %b %Y, %H:%M UTC') if next_run and next_run.next_run_time else None
     except Exception:
         next_run_time = None
-    return render_template('admin.html', states=states, scrape_logs=scrape_logs,
-                           next_run_time=next_run_time)
+    return render_template('admin.html', states=states, scrape_logs=scrape_logs, jobs=jobs,
+                           total_lgas=sum(lga_counts_by_state().values()),
+                           next_run_time=next_run_time,
+                           cache_stats=response_cache.stats())
 
 
-@app.route('/admin/add_allocation', methods=['POST'])
+@bp.route('/admin/add_allocation', methods=['POST'])
 @login_required
 def admin_add_allocation():
     state_id = request.form.get('state_id', type=int)
     month = request.form.get('month', type=int)
     year = request.form.get('year', type=int)
-    statutory = request.form.get('statutory_allocation', type=float, default=0)
-    vat = request.form.get('vat_allocation', type=float, default=0)
-    deductions = request.form.get('deductions', type=float, default=0)
-    total_gross = statutory + vat
-    net = total_gross - deductions
+    statutory = to_kobo(request.form.get('statutory_allocation', type=float, default=0))
+    vat = to_kobo(request.form.get('vat_allocation', type=float, default=0))
+    deductions = to_kobo(request.form.get('deductions', type=float, default=0))
+    statutory, vat, total_gross, deductions, net = map(
+        from_kobo, (statutory, vat, statutory + vat, deductions, statutory + vat - deductions))
 
     existing = FAACAllocation.query.filter_by(
         state_id=state_id, lga_id=None, month=month, year=year
@@ -560,50 +2717,641 @@ def admin_add_allocation():
         db.session.add(alloc)
         flash('Allocation added.', 'success')
 
+    refresh_rollups(year, month)
+    bump_data_version()
     db.session.commit()
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard'))
 
 
-@app.route('/api/lgas/<int:state_id>')
+@bp.route('/api/lgas/<int:state_id>')
+@conditional_response
+@query_budget(2)
 def api_lgas(state_id):
     lgas = LGA.query.filter_by(state_id=state_id).order_by(LGA.name).all()
     return jsonify([{'id': lg.id, 'name': lg.name} for lg in lgas])
 
 
-@app.route('/admin/run_scraper', methods=['POST'])
+@bp.route('/admin/run_scraper', methods=['POST'])
 @login_required
 def admin_run_scraper():
     target_month = request.form.get('target_month', type=int)
     target_year = request.form.get('target_year', type=int)
-    scrape_faac_data(target_month=target_month, target_year=target_year)
-    flash('Scraper run completed. Check the scrape history below for results.', 'info')
-    return redirect(url_for('admin_dashboard'))
+    if target_month is not None and target_month not in MONTH_NAMES:
+        flash('Choose a month between 1 and 12.', 'danger')
+        return redirect(url_for('main.admin_dashboard'))
+    description = (f'Scrape {MONTH_NAMES[target_month]} {target_year}'
+                   if target_month and target_year else 'Scrape previous month')
+    job = submit_job('scrape', description, scrape_faac_data, target_month, target_year)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(job.to_dict()), 202
+    flash(f'{description} queued. Progress is shown below.', 'info')
+    return redirect(url_for('main.admin_dashboard'))
+
+
+@bp.route('/admin/run_backfill', methods=['POST'])
+@login_required
+def admin_run_backfill():
+    start = (request.form.get('start_year', type=int), request.form.get('start_month', type=int))
+    end = (request.form.get('end_year', type=int), request.form.get('end_month', type=int))
+    if None in start or None in end or start > end:
+        flash('Choose a start month that is not after the end month.', 'danger')
+        return redirect(url_for('main.admin_dashboard'))
+    if start[1] not in MONTH_NAMES or end[1] not in MONTH_NAMES:
+        flash('Choose months between 1 and 12.', 'danger')
+        return redirect(url_for('main.admin_dashboard'))
+    description = f'Backfill {MONTH_NAMES[start[1]]} {start[0]} to {MONTH_NAMES[end[1]]} {end[0]}'
+    job = submit_job('backfill', description, backfill_faac_data, start, end)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(job.to_dict()), 202
+    flash(f'{description} queued. Progress is shown below.', 'info')
+    return redirect(url_for('main.admin_dashboard'))
+
+
+@bp.route('/admin/jobs')
+@login_required
+def admin_jobs():
+    jobs = ScrapeJob.query.order_by(ScrapeJob.created_at.desc()).limit(10).all()
+    return jsonify([job.to_dict() for job in jobs])
 
 
-# ── Init ────────────────────────────────────────────────────────────────────
+@bp.route('/admin/jobs/<job_id>')
+@login_required
+def admin_job_status(job_id):
+    job = db.session.get(ScrapeJob, job_id)
+    if job is None:
+        abort(404)
+    return jsonify(job.to_dict())
+
+
+@bp.route('/admin/metrics')
+@login_required
+def admin_metrics():
+    return render_template('admin_metrics.html', enabled=current_app.config['REQUEST_METRICS'],
+                           routes=request_metrics.summary(), started_at=request_metrics.started_at,
+                           metric_names=REQUEST_METRICS, pid=os.getpid())
+
+
+@bp.route('/admin/metrics.txt')
+def admin_metrics_text():
+    # Scrapers can't log in; they send METRICS_TOKEN as a bearer token instead.
+    token = current_app.config['METRICS_TOKEN']
+    auth = request.authorization
+    authorized = session.get('admin') or (
+        token and auth is not None and auth.type == 'bearer'
+        and hmac.compare_digest(auth.token or '', token))
+    if not authorized:
+        return current_app.response_class('Unauthorized\n', status=401, mimetype='text/plain',
+                                          headers={'WWW-Authenticate': 'Bearer'})
+    return current_app.response_class(request_metrics.prometheus_text(),
+                                      mimetype='text/plain; version=0.0.4')
+
+
+@bp.route('/admin/metrics/reset', methods=['POST'])
+@login_required
+def admin_metrics_reset():
+    request_metrics.clear()
+    flash('Request metrics reset.', 'info')
+    return redirect(url_for('main.admin_metrics'))
+
+
+# ── CLI ─────────────────────────────────────────────────────────────────────
+
+PLAN_CHECKED_TABLES = ('faac_allocations', 'igr', 'lgas')
+# Full scans check-query-plans accepts, as (table, covering index): reading
+# the whole index is the point of the query and never touches the table.
+PLAN_ALLOWED_SCANS = {
+    ('lgas', 'ix_lgas_state_name'),  # SearchIndex.build lists every LGA name
+}
+
+
+def _sample_route_urls():
+    """Return a representative URL for each public page and JSON endpoint."""
+    lga = LGA.query.order_by(LGA.id).first()
+    state = lga.state if lga else State.query.order_by(State.id).first()
+    other = State.query.filter(State.id != state.id).order_by(State.id).first() if state else None
+    urls = ['/', url_for('main.api_analytics_rankings', level='lga')]
+    if state:
+        urls.append(url_for('main.state_detail', name=state.name))
+        urls.append(url_for('main.api_state_series', name=state.name, fields='net_allocation',
+                            cursor='2020-01'))
+        urls.append(url_for('main.compare', states=[state.name] + ([other.name] if other else [])))
+    if lga:
+        urls.append(url_for('main.lga_detail', state_name=state.name, lga_name=lga.name))
+        urls.append(url_for('main.api_lga_series', state_name=state.name, lga_name=lga.name))
+        urls.append(url_for('main.api_analytics_lga', state_name=state.name, lga_name=lga.name))
+        urls.append(url_for('main.api_search', q=lga.name[:3]))
+        urls.append(url_for('main.api_lgas', state_id=state.id))
+    return urls
+
+
+def _requests_after_writes(client, urls):
+    """Request each URL in steady state, then again right after a write.
+
+    Nothing is warmed first: the write bumps the data version, so caches and
+    in-memory structures keyed on it (pages, search index, analytics) are
+    out of date, as they are for the first request after a scrape. Yields
+    (label, response or the exception the request raised).
+    """
+    for url in urls:
+        for after_write in (False, True):
+            if after_write:
+                bump_data_version()
+                db.session.commit()
+            response_cache.clear()
+            try:
+                yield f'{url} (after a write)' if after_write else url, client.get(url)
+            except Exception as e:
+                yield f'{url} (after a write)' if after_write else url, e
+
+
+def check_query_plans():
+    """Run every public page and EXPLAIN each SQL statement it issues.
+
+    Returns a list of (url, statement, plan_detail) tuples for statements
+    that scan a whole allocation, IGR or LGA table or index, other than the
+    covering-index scans in PLAN_ALLOWED_SCANS. Bumps the data version.
+    """
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # Only the request's own statements; background rebuilds are off its path.
+        if has_request_context() and statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    client = current_app.test_client()
+    with current_app.test_request_context():
+        urls = _sample_route_urls()
+
+    problems = []
+    for engine in db.engines.values():
+        db.event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        for url in urls:
+            for label, _ in _requests_after_writes(client, [url]):
+                statements = list(captured)
+                captured.clear()
+                with db.engine.connect() as conn:
+                    for statement, parameters in statements:
+                        plan = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+                        for row in plan:
+                            detail = row[-1]
+                            words = detail.split()
+                            if len(words) < 2 or words[0] != 'SCAN' or words[1] not in PLAN_CHECKED_TABLES:
+                                continue
+                            if 'COVERING INDEX' in detail and (words[1], words[-1]) in PLAN_ALLOWED_SCANS:
+                                continue
+                            problems.append((label, statement, detail))
+    finally:
+        for engine in db.engines.values():
+            db.event.remove(engine, 'before_cursor_execute', capture)
+    return problems
+
+
+def check_query_budgets():
+    """Run every sample URL uncached, in steady state and right after a write,
+    and return the ones over their query budget. Bumps the data version."""
+    client = current_app.test_client()
+    with current_app.test_request_context():
+        urls = _sample_route_urls()
+
+    problems = []
+    testing = current_app.testing
+    current_app.testing = True
+    try:
+        for label, result in _requests_after_writes(client, urls):
+            if isinstance(result, QueryBudgetExceeded):
+                problems.append((label, str(result)))
+            elif isinstance(result, Exception):
+                raise result
+    finally:
+        current_app.testing = testing
+    return problems
+
+
+def _parse_year_month(value):
+    """Parse 'YYYY-MM' into (year, month)."""
+    try:
+        year, month = (int(part) for part in value.split('-'))
+    except ValueError:
+        raise click.BadParameter(f'{value!r} is not in YYYY-MM form.')
+    if not 1 <= month <= 12:
+        raise click.BadParameter(f'{value!r} has no month {month}.')
+    return year, month
+
+
+@bp.cli.command('init-db')
+def init_db_command():
+    """Upgrade the schema and seed the database if it is empty."""
+    init_db(current_app)
+    print('Database ready.')
+
+
+@bp.cli.command('build-snapshot')
+@click.option('--output', help='Snapshot path (default: DB_SNAPSHOT_PATH).')
+def build_snapshot_command(output):
+    """Seed if needed, then write a compacted database snapshot for cold starts."""
+    if _sqlite_path() is None:
+        raise SystemExit('build-snapshot only supports SQLite.')
+    output = output or current_app.config['DB_SNAPSHOT_PATH']
+    init_db(current_app)
+    start = time.perf_counter()
+    checksum = build_snapshot(output)
+    print(f'Wrote {output} ({os.path.getsize(output) / 1024 / 1024:.1f} MB, sha256 {checksum[:12]}) '
+          f'in {time.perf_counter() - start:.2f}s.')
+
+
+@bp.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Create missing tables and indexes in an existing database."""
+    upgrade_db()
+    print('Database schema is up to date.')
+
+
+@bp.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute the national, zone and state monthly rollup tables."""
+    rebuild_rollups()
+    bump_data_version()
+    db.session.commit()
+    print(f'Rebuilt rollups for {NationalMonthlyTotal.query.count()} months.')
+
+
+@bp.cli.command('backfill')
+@click.argument('start')
+@click.argument('end')
+@click.option('--workers', default=4, show_default=True, help='Concurrent downloads and parser processes.')
+def backfill_command(start, end, workers):
+    """Scrape every month from START to END (YYYY-MM), resuming an interrupted run."""
+    summary = backfill_faac_data(_parse_year_month(start), _parse_year_month(end), workers=workers)
+    print(', '.join(f'{k}: {v}' for k, v in summary.items()))
+
+
+@bp.cli.command('reparse-cache')
+@click.option('--month', 'period', help='Only workbooks for this month (YYYY-MM).')
+def reparse_cache_command(period):
+    """Re-run the parser offline on cached NBS workbooks and compare with the database."""
+    period = _parse_year_month(period) if period else None
+    state_lookup = _build_state_lookup()
+    lga_lookup = _build_lga_lookup()
+    for meta in workbook_cache.entries():
+        year, month = meta['year'], meta['month']
+        if period and (year, month) != period:
+            continue
+        records = _parse_workbook_bytes(workbook_cache.read(meta['sha256']), state_lookup, lga_lookup)
+        stored = dict(((state_id, lga_id), net) for state_id, lga_id, net in db.session.query(
+            FAACAllocation.state_id, FAACAllocation.lga_id, kobo(FAACAllocation.net_allocation)
+        ).filter_by(year=year, month=month))
+        states = sum(1 for rec in records if rec['lga_id'] is None)
+        changed = sum(1 for rec in records
+                      if stored.get((rec['state_id'], rec['lga_id'])) != to_kobo(rec['net']))
+        print(f"{MONTH_NAMES[month]} {year} [{meta['sha256'][:12]}] {meta['url']}: "
+              f"{states} states, {len(records) - states} LGAs, {changed} differ from the database")
+
+
+@bp.cli.command('export')
+@click.argument('dataset', type=click.Choice(EXPORT_DATASETS))
+@click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='csv', show_default=True)
+@click.option('--output', '-o', type=click.File('wb'), default='-', help='Output file (default stdout).')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output (implied by a .gz output name).')
+@click.option('--start-year', type=int)
+@click.option('--end-year', type=int)
+@click.option('--zone', type=click.Choice(GEO_ZONES, case_sensitive=False))
+@click.option('--level', type=click.Choice(EXPORT_LEVELS))
+def export_command(dataset, fmt, output, compress, **filters):
+    """Stream every allocation or IGR row as CSV or NDJSON."""
+    compress = compress or output.name.endswith('.gz')
+    for chunk in iter_export(dataset, fmt, compress, **filters):
+        output.write(chunk)
+
+
+@bp.cli.command('check-query-budgets')
+def check_query_budgets_command():
+    """Fail if any public page issues more SQL queries than it declares, also after a write."""
+    problems = check_query_budgets()
+    for url, message in problems:
+        print(f'{url}: {message}')
+    if problems:
+        raise SystemExit(1)
+    print('All public pages are within their query budgets.')
+
+
+@bp.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Fail if any public page does a full table scan, also after a write (SQLite only)."""
+    if db.engine.dialect.name != 'sqlite':
+        raise SystemExit('check-query-plans only supports SQLite.')
+    problems = check_query_plans()
+    for url, statement, detail in problems:
+        print(f'{url}: {detail}\n    {" ".join(statement.split())}')
+    if problems:
+        raise SystemExit(1)
+    print('All public pages use indexes.')
+
+
+# ── Database engines ────────────────────────────────────────────────────────
+# Several gunicorn workers share one SQLite file. The 'web' profile puts it in
+# WAL mode, so readers keep seeing the last committed data while a scrape or
+# admin write holds the write lock, tunes each connection's pragmas, and
+# gives public pages a separate pool of read-only connections. The 'default'
+# profile keeps SQLAlchemy's settings for the CLI, scripts and benchmarks.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',       # persistent; only set on the primary engine
+    'synchronous': 'NORMAL',     # fsync at checkpoints: safe with WAL
+    'busy_timeout': 5000,        # ms a writer waits for the write lock
+    'cache_size': -32768,        # page cache per connection, in KiB when negative
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+DB_PROFILES = {
+    'default': {'pool': False, 'sqlite_pragmas': False, 'read_only': False},
+    'web': {'pool': True, 'sqlite_pragmas': True, 'read_only': True},
+}
+
+
+def _is_sqlite_file(url):
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def configure_database(app):
+    """Set engine options and binds for app.config['DB_PROFILE']. Call before db.init_app."""
+    from sqlalchemy.engine import make_url
+    name = app.config['DB_PROFILE']
+    if name not in DB_PROFILES:
+        raise ValueError(f'Unknown DB_PROFILE {name!r}; choose from {", ".join(DB_PROFILES)}.')
+    profile = DB_PROFILES[name]
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    is_sqlite_file = _is_sqlite_file(url)
+
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if profile['pool'] and (is_sqlite_file or url.get_backend_name() != 'sqlite'):
+        # Per worker process: request threads plus scrape jobs and the scheduler
+        options.setdefault('pool_size', app.config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', app.config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', 10)
+        if url.get_backend_name() != 'sqlite':
+            options.setdefault('pool_pre_ping', True)
+            options.setdefault('pool_recycle', 1800)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    if profile['read_only'] and is_sqlite_file:
+        read_only = url.set(database=f'file:{url.database}', query={**url.query, 'mode': 'ro', 'uri': 'true'})
+        app.config['SQLALCHEMY_BINDS'] = {
+            **(app.config.get('SQLALCHEMY_BINDS') or {}),
+            READ_ONLY_BIND: {**options, 'url': read_only},
+        }
+
+
+def _sqlite_pragma_setter(read_only):
+    pragmas = [(k, v) for k, v in SQLITE_PRAGMAS.items() if not (read_only and k == 'journal_mode')]
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for key, value in pragmas:
+                cursor.execute(f'PRAGMA {key} = {value}')
+        finally:
+            cursor.close()
+    return set_pragmas
+
+
+def _init_engines():
+    """Hook the profile's pragmas into every SQLite file engine. Needs an app context."""
+    if not DB_PROFILES[current_app.config['DB_PROFILE']]['sqlite_pragmas']:
+        return
+    for key, engine in db.engines.items():
+        if _is_sqlite_file(engine.url):
+            db.event.listen(engine, 'connect', _sqlite_pragma_setter(read_only=key == READ_ONLY_BIND))
+
+
+# ── Database snapshot ───────────────────────────────────────────────────────
+# Hosts with an ephemeral filesystem start every deploy with no database.
+# Rather than seeding at boot, the build step writes a compacted, analysed
+# copy of a seeded (and scraped) database next to a SHA-256 checksum, and
+# init_db copies it into place when the database file is missing.
+
+SNAPSHOT_VOLATILE_TABLES = ('scrape_jobs', 'scheduler_leases')
+
+
+def _sqlite_path():
+    """Return the SQLite database file path, or None for other databases."""
+    url = db.engine.url
+    return url.database if _is_sqlite_file(url) else None
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_snapshot(output):
+    """Write a compacted copy of the current SQLite database to output.
+
+    Per-process tables (jobs, scheduler leases) are emptied, ANALYZE stats
+    are included for the query planner, and the SHA-256 is written to
+    output + '.sha256'. Returns the checksum.
+    """
+    import sqlite3
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp = f'{output}.{os.getpid()}.tmp'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql('VACUUM INTO ?', (tmp,))
+    snapshot = sqlite3.connect(tmp)
+    try:
+        for table in SNAPSHOT_VOLATILE_TABLES:
+            snapshot.execute(f'DELETE FROM {table}')
+        snapshot.commit()
+        snapshot.execute('ANALYZE')
+        snapshot.execute('VACUUM')
+        snapshot.commit()
+    finally:
+        snapshot.close()
+    checksum = _file_sha256(tmp)
+    os.replace(tmp, output)
+    with open(f'{output}.sha256', 'w') as f:
+        f.write(f'{checksum}  {os.path.basename(output)}\n')
+    return checksum
+
+
+def restore_snapshot(snapshot, target):
+    """Copy snapshot to target if target does not exist and the checksum matches.
+
+    Returns True if this process restored it. Safe when several workers boot
+    at once: the copy is linked into place, which fails if another worker
+    got there first.
+    """
+    if os.path.exists(target) or not os.path.exists(snapshot):
+        return False
+    try:
+        with open(f'{snapshot}.sha256') as f:
+            expected = f.read().split()[0]
+    except (OSError, IndexError):
+        logger.warning(f'Snapshot {snapshot} has no checksum file; not using it.')
+        return False
+    if _file_sha256(snapshot) != expected:
+        logger.error(f'Snapshot {snapshot} does not match its checksum; not using it.')
+        return False
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f'{target}.{os.getpid()}.tmp'
+    shutil.copyfile(snapshot, tmp)
+    try:
+        os.link(tmp, target)
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(tmp)
+    return True
+
+
+# ── App factory ─────────────────────────────────────────────────────────────
+
+def create_app(config=None):
+    """Build the app: configuration, extensions, routes and CLI commands.
+
+    Does no database work and starts no threads, so it is cheap to call from
+    the CLI, scripts and benchmarks. init_db and start_scheduler are the
+    separate steps a serving process takes; create_web_app runs all three.
+    """
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY=os.environ.get('SECRET_KEY', 'faac-tracker-dev-key-change-in-prod'),
+        SQLALCHEMY_DATABASE_URI=os.environ.get('DATABASE_URL', 'sqlite:///faac.db'),
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        ADMIN_PASSWORD=os.environ.get('ADMIN_PASSWORD', 'admin123'),
+        ENFORCE_QUERY_BUDGETS=os.environ.get('ENFORCE_QUERY_BUDGETS') == '1',
+        RESPONSE_CACHE_MAX_ENTRIES=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 512)),
+        RESPONSE_CACHE_MAX_BYTES=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+        NBS_CACHE_DIR=os.environ.get('NBS_CACHE_DIR') or os.path.join(app.instance_path, 'nbs_cache'),
+        DB_SNAPSHOT_PATH=os.environ.get('DB_SNAPSHOT_PATH') or os.path.join(app.root_path, 'snapshot', 'faac.db'),
+        REQUEST_METRICS=os.environ.get('REQUEST_METRICS') == '1',
+        METRICS_TOKEN=os.environ.get('METRICS_TOKEN'),
+        DB_PROFILE=os.environ.get('DB_PROFILE', 'default'),
+        DB_POOL_SIZE=int(os.environ.get('DB_POOL_SIZE', 5)),
+        DB_MAX_OVERFLOW=int(os.environ.get('DB_MAX_OVERFLOW', 5)),
+    )
+    if config:
+        app.config.update(config)
+
+    configure_database(app)
+    db.init_app(app)
+    app.register_blueprint(bp)
+    response_cache.init_app(app)
+    workbook_cache.init_app(app)
+    with app.app_context():
+        _init_engines()
+        for engine in db.engines.values():
+            db.event.listen(engine, 'before_cursor_execute', _count_query)
+    if app.config['REQUEST_METRICS']:
+        init_request_metrics(app)
+    return app
+
+
+@contextmanager
+def _init_lock(app):
+    """Hold an exclusive lock on a file next to the database. Needs an app context.
+
+    Processes booting together on one host (gunicorn workers) take turns;
+    without fcntl (Windows) there is no lock.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    path = (_sqlite_path() or os.path.join(app.instance_path, 'faac')) + '.init.lock'
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def init_db(app):
+    """Restore the snapshot if there is no database yet, upgrade the schema
+    and seed the database if it is still empty.
+
+    gunicorn.conf.py runs this once in the master before any worker starts.
+    Each worker runs it again through create_web_app, under _init_lock, so
+    concurrent boots never race on DDL and find nothing left to do.
+    """
+    with app.app_context(), _init_lock(app):
+        target = _sqlite_path()
+        if target and restore_snapshot(app.config['DB_SNAPSHOT_PATH'], target):
+            logger.info(f'Restored database from snapshot {app.config["DB_SNAPSHOT_PATH"]}.')
+        upgrade_db()
+        expire_orphaned_jobs()
+        # Auto-seed if database is empty (needed for Railway's ephemeral filesystem)
+        if State.query.count() == 0:
+            from seed_data import seed
+            seed(bulk=True)
 
-with app.app_context():
-    db.create_all()
-    # Auto-seed if database is empty (needed for Railway's ephemeral filesystem)
-    if State.query.count() == 0:
-        from seed_data import seed
-        seed()
 
 # ── Scheduler ───────────────────────────────────────────────────────────────
 
-scheduler = BackgroundScheduler()
-scheduler.add_job(
-    func=scrape_faac_data,
-    trigger='cron',
-    day=15,
-    hour=9,  # 9 AM UTC
-    id='faac_monthly_scrape',
-    misfire_grace_time=86400,  # allow 24h grace if missed
-    replace_existing=True,
-)
-scheduler.start()
-logger.info('APScheduler started. FAAC scraper scheduled for the 15th of each month at 9 AM UTC.')
+scheduler = None
+
+
+def start_scheduler(app):
+    """Start this process's scheduler; jobs only run while it holds the lease."""
+    global scheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(
+        func=run_as_leader,
+        args=[app, scrape_faac_data],
+        trigger='cron',
+        day=15,
+        hour=9,  # 9 AM UTC
+        id='faac_monthly_scrape',
+        misfire_grace_time=86400,  # allow 24h grace if missed
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        func=_renew_scheduler_lease,
+        args=[app],
+        trigger='interval',
+        seconds=max(1, SCHEDULER_LEASE_SECONDS // 3),
+        id='scheduler_lease_renewal',
+        next_run_time=datetime.now(),
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        func=heartbeat_jobs,
+        args=[app],
+        trigger='interval',
+        seconds=JOB_HEARTBEAT_SECONDS,
+        id='scrape_job_heartbeat',
+        replace_existing=True,
+    )
+    scheduler.start()
+    atexit.register(_release_scheduler_lease_at_exit, app)
+    logger.info('APScheduler started. FAAC scraper scheduled for the 15th of each month at 9 AM UTC.')
+    return scheduler
+
+
+def create_web_app():
+    """Gunicorn entry point: build the app, prepare the database, start the scheduler.
+
+    Uses the 'web' database profile unless DB_PROFILE says otherwise.
+    """
+    app = create_app({'DB_PROFILE': os.environ.get('DB_PROFILE', 'web')})
+    init_db(app)
+    with app.test_request_context():
+        get_search_index()
+        build_analytics()
+    start_scheduler(app)
+    return app
+
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(debug=True, host='0.0.0.0', port=port)
+    create_web_app().run(debug=True, host='0.0.0.0', port=port)
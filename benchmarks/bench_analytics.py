@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+bench_analytics.py - Build the NumPy analytics engine over a multi-year
+history and time all-entity rankings (rank, growth, percentile and zone
+share for every LGA in a month) against ranking the same month in SQL.
+
+Earlier years are filled by copying the seeded months back in time.
+
+Usage:
+    python benchmarks/bench_analytics.py [--years N] [--repeat N]
+"""
+
+import atexit
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="faac-bench-")
+atexit.register(shutil.rmtree, SCRATCH_DIR, True)
+os.environ["DATABASE_URL"] = f"sqlite:///{SCRATCH_DIR}/bench.db"
+os.environ["DB_SNAPSHOT_PATH"] = os.path.join(SCRATCH_DIR, "no-snapshot.db")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app import AnalyticsEngine, FAACAllocation, LGA, State, create_app, db, init_db  # noqa: E402
+
+# All-LGA rankings for one month, uncached, must take less than this
+TARGET_MS = 20
+
+
+def _arg(name, default):
+    return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+def _extend_history(years):
+    """Copy the seeded months back in time, without gaps, until they span at least `years` years."""
+    period = FAACAllocation.year * 12 + FAACAllocation.month - 1
+    first, last = db.session.query(db.func.min(period), db.func.max(period)).one()
+    span = last - first + 1
+    for shift in range(span, years * 12, span):
+        db.session.execute(db.text(
+            "INSERT INTO faac_allocations (state_id, lga_id, year, month, statutory_allocation,"
+            " vat_allocation, total_gross, deductions, net_allocation)"
+            " SELECT state_id, lga_id, (year * 12 + month - 1 - :shift) / 12,"
+            " (year * 12 + month - 1 - :shift) % 12 + 1, statutory_allocation, vat_allocation,"
+            " total_gross, deductions, net_allocation FROM faac_allocations"
+            " WHERE year * 12 + month - 1 >= :first"
+        ), {"shift": shift, "first": first})
+    db.session.commit()
+
+
+def _best_ms(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def _sql_ranking(year, month):
+    """Rank every LGA for a month the per-request way: an ORM query sorted by net allocation."""
+    rows = db.session.query(LGA.name, State.name, State.geo_zone, FAACAllocation.net_allocation).join(
+        LGA, FAACAllocation.lga_id == LGA.id
+    ).join(State, FAACAllocation.state_id == State.id).filter(
+        FAACAllocation.year == year, FAACAllocation.month == month
+    ).order_by(FAACAllocation.net_allocation.desc()).all()
+    return [{"rank": i, "name": lga, "state": state, "geo_zone": zone, "net_allocation": net}
+            for i, (lga, state, zone, net) in enumerate(rows, start=1)]
+
+
+def main():
+    years, repeat = _arg("--years", 20), _arg("--repeat", 20)
+    app = create_app()
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_db(app)
+
+    with app.app_context():
+        _extend_history(years)
+        rows = FAACAllocation.query.count()
+
+        start = time.perf_counter()
+        engine = AnalyticsEngine.build(0)
+        build = time.perf_counter() - start
+        panel = engine.panels["lga"]
+        t = engine.latest_position("lga")
+        year, month = engine.months[t]
+
+        vectorised = _best_ms(lambda: panel.metrics(t), repeat)
+
+        def full_rankings():
+            engine._metrics.clear()
+            return engine.rankings("lga")
+
+        rankings = _best_ms(full_rankings, repeat)
+        sql = _best_ms(lambda: _sql_ranking(year, month), repeat)
+        expected = [r["name"] for r in _sql_ranking(year, month)]
+        same_order = [e["name"] for e in engine.rankings("lga")["entities"]] == expected
+
+    print(f"Dataset:   {rows} allocation rows, {len(engine.months)} months, "
+          f"{len(panel.names)} LGAs and {len(engine.panels['state'].names)} states")
+    print(f"Build:     {build * 1000:.0f} ms to load the (entity, month) arrays")
+    print(f"Metrics:   {vectorised:.2f} ms for rank, growth, percentile and zone share of every LGA")
+    print(f"Rankings:  {rankings:.2f} ms for the full /api/analytics/rankings?level=lga payload")
+    print(f"SQL:       {sql:.2f} ms to rank the same month with an ORM query (rank only)")
+    print(f"Same order as SQL: {'yes' if same_order else 'NO'} (best of {repeat})")
+    if not same_order or rankings > TARGET_MS:
+        print(f"FAIL: rankings must match SQL and take under {TARGET_MS} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
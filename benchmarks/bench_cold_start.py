@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+bench_cold_start.py - Time a cold boot (fresh interpreter, no database file)
+that seeds at startup against one that restores the prebuilt snapshot, and
+check that a corrupted snapshot is rejected.
+
+Usage:
+    python benchmarks/bench_cold_start.py [--repeat N]
+"""
+
+import atexit
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCRATCH_DIR = tempfile.mkdtemp(prefix="faac-bench-")
+atexit.register(shutil.rmtree, SCRATCH_DIR, True)
+SNAPSHOT = os.path.join(SCRATCH_DIR, "snapshot", "faac.db")
+
+# Runs in the child: boot the database the way create_web_app does and
+# print the seconds spent importing the app and in init_db.
+BOOT = """
+import contextlib, io, time
+start = time.perf_counter()
+import app
+flask_app = app.create_app()
+ready = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    app.init_db(flask_app)
+print(ready - start, time.perf_counter() - ready)
+"""
+BUILD = """
+import app
+flask_app = app.create_app()
+with flask_app.app_context():
+    app.build_snapshot({snapshot!r})
+"""
+
+
+def _run(code, db_path, snapshot):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", DB_SNAPSHOT_PATH=snapshot)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+    return proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else None
+
+
+def _cold_boot(snapshot, repeat):
+    """Best (import, init_db) seconds over repeat runs, each with no database file."""
+    db_path = os.path.join(SCRATCH_DIR, "boot.db")
+    times = []
+    for _ in range(repeat):
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        times.append(tuple(float(t) for t in _run(BOOT, db_path, snapshot).split()))
+    return min(times, key=sum), db_path
+
+
+def _row_counts(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("states", "lgas", "faac_allocations", "igr", "rollup_national_monthly")}
+    finally:
+        conn.close()
+
+
+def main():
+    repeat = int(sys.argv[sys.argv.index("--repeat") + 1]) if "--repeat" in sys.argv else 3
+    missing = os.path.join(SCRATCH_DIR, "no-snapshot.db")
+
+    seeded, seeded_db = _cold_boot(missing, repeat)
+    expected = _row_counts(seeded_db)
+    _run(BUILD.format(snapshot=SNAPSHOT), seeded_db, missing)
+    restored, restored_db = _cold_boot(SNAPSHOT, repeat)
+    restored_ok = _row_counts(restored_db) == expected
+
+    # Flip one byte in a copy of the snapshot: boot must reject it and seed instead
+    corrupt = os.path.join(SCRATCH_DIR, "corrupt", "faac.db")
+    os.makedirs(os.path.dirname(corrupt))
+    shutil.copy(SNAPSHOT, corrupt)
+    shutil.copy(SNAPSHOT + ".sha256", corrupt + ".sha256")
+    with open(corrupt, "r+b") as f:
+        f.seek(os.path.getsize(corrupt) // 2)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    corrupt_db = os.path.join(SCRATCH_DIR, "corrupt.db")
+    _run(BOOT, corrupt_db, corrupt)
+    corrupt_rejected = _row_counts(corrupt_db) == expected
+
+    print(f"Snapshot:        {os.path.getsize(SNAPSHOT) / 1024 / 1024:.1f} MB, "
+          f"{expected['faac_allocations']} allocation rows")
+    for label, (imported, init) in (("Seed at boot:   ", seeded), ("Restore at boot:", restored)):
+        print(f"{label} {imported + init:.3f}s total, {init:.3f}s in init_db (best of {repeat})")
+    print(f"init_db is {seeded[1] / restored[1]:.0f}x faster with the snapshot")
+    print(f"Restored rows match seeded rows: {'yes' if restored_ok else 'NO'}")
+    print(f"Corrupted snapshot rejected (seeded instead): {'yes' if corrupt_rejected else 'NO'}")
+    if not (restored_ok and corrupt_rejected and restored[1] < seeded[1]):
+        print("FAIL: restoring the snapshot must be faster than seeding and give the same data")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
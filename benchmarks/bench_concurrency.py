@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+bench_concurrency.py - Read public pages while another process ingests full
+months of allocations, once per database profile, and check that the 'web'
+profile (WAL, read-only connections) keeps reads from being blocked.
+
+Each profile gets its own scratch database holding a synthetic history. The
+writer process re-ingests the latest month with changed figures through the
+scraper's _ingest_month (upsert, rollups, data version, scrape log) back to
+back. --readers threads in this process request the series, compare and LGA
+list endpoints with the page cache off, first alone and then during the
+ingests (pages built on the analytics engine would mostly time its rebuild
+after each data version bump). Alongside them a probe runs a small read with
+busy_timeout = 0 in a loop, so every read that would have waited on the
+writer's lock fails and is counted.
+
+Page latencies also include CPU contention with the writer process, which
+dominates on a single core; the blocked probe reads isolate lock waits.
+
+Usage:
+    python benchmarks/bench_concurrency.py [--years N] [--seconds N] [--readers N]
+"""
+
+import atexit
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+PROFILES = ("default", "web")
+PROBE_QUERY = "SELECT COUNT(*), SUM(net_allocation) FROM rollup_national_monthly"
+
+
+def _arg(name, default):
+    return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+def _app(db_path, profile):
+    from app import create_app
+    return create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}", "DB_PROFILE": profile,
+                       "DB_SNAPSHOT_PATH": db_path + ".no-snapshot", "RESPONSE_CACHE_MAX_ENTRIES": 0})
+
+
+def build_database(db_path, years):
+    from app import create_app
+    from seed_data import seed
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}"})
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        seed(fresh=True, history=((2, 2026 - years), (1, 2026)))
+
+
+def writer(db_path, profile, seconds, started, results):
+    """Re-ingest January 2026 with scaled figures until `seconds` have passed."""
+    from datetime import datetime
+    from app import FAACAllocation, _ingest_month, db
+    app = _app(db_path, profile)
+    with app.app_context():
+        base = [{"state_id": s, "lga_id": l, "statutory": a, "vat": v, "deductions": d, "net": n}
+                for s, l, a, v, d, n in db.session.query(
+                    FAACAllocation.state_id, FAACAllocation.lga_id, FAACAllocation.statutory_allocation,
+                    FAACAllocation.vat_allocation, FAACAllocation.deductions, FAACAllocation.net_allocation,
+                ).filter_by(year=2026, month=1)]
+        db.session.rollback()
+        started.set()
+        rng, durations = random.Random(0), []
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            factor = rng.uniform(0.98, 1.02)
+            records = [{**rec, **{k: rec[k] * factor for k in ("statutory", "vat", "deductions", "net")}}
+                       for rec in base]
+            start = time.perf_counter()
+            _ingest_month(records, 1, 2026, "bench", datetime.utcnow())
+            durations.append(time.perf_counter() - start)
+    results.put(durations)
+
+
+def read_urls(db_path):
+    import sqlite3
+    conn = sqlite3.connect(db_path)
+    try:
+        states = conn.execute("SELECT id, name FROM states ORDER BY id").fetchall()
+        lgas = conn.execute("SELECT states.name, lgas.name FROM lgas JOIN states ON states.id = lgas.state_id"
+                            " ORDER BY lgas.id LIMIT 100").fetchall()
+    finally:
+        conn.close()
+    rng = random.Random(0)
+    return ([f"/api/state/{quote(name)}/series" for _, name in states]
+            + [f"/api/lga/{quote(s)}/{quote(lga)}/series" for s, lga in lgas]
+            + ["/compare?" + "&".join(f"states={quote(name)}" for _, name in rng.sample(states, 3))
+               for _ in range(20)]
+            + [f"/api/lgas/{state_id}" for state_id, _ in states])
+
+
+def probe(app, seconds):
+    """Return (reads, reads that found the database locked) over `seconds`."""
+    from sqlalchemy.exc import OperationalError
+    from app import READ_ONLY_BIND, db
+    reads = blocked = 0
+    with app.app_context():
+        engine = db.engines.get(READ_ONLY_BIND, db.engine)  # the engine public pages read from
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA busy_timeout = 0")
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                try:
+                    conn.exec_driver_sql(PROBE_QUERY).all()
+                except OperationalError as e:
+                    if "locked" not in str(e):
+                        raise
+                    blocked += 1
+                conn.rollback()
+                reads += 1
+                time.sleep(0.001)
+            conn.invalidate()  # keep busy_timeout = 0 out of the pool
+    return reads, blocked
+
+
+def read_load(app, urls, readers, seconds):
+    """Return (sorted page latencies, page errors, probe reads, blocked probe reads)."""
+    latencies, errors, probed = [], 0, []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def reader(offset):
+        nonlocal errors
+        client = app.test_client()
+        i = offset
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = client.get(urls[i % len(urls)]).status_code == 200
+            except Exception:  # "database is locked" surfaces as an exception
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors += not ok
+            i += readers
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads.append(threading.Thread(target=lambda: probed.extend(probe(app, seconds))))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return (sorted(latencies), errors, *probed)
+
+
+def _summary(latencies, errors, probes, blocked):
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+    top = latencies[-1] * 1000 if latencies else 0.0
+    return (f"{len(latencies):>5} pages  p50 {pct(0.5):6.1f} ms  p99 {pct(0.99):6.1f} ms  max {top:6.1f} ms  "
+            f"{errors} errors; {blocked} of {probes} probe reads blocked")
+
+
+def main():
+    years, seconds, readers = _arg("--years", 10), _arg("--seconds", 10), _arg("--readers", 4)
+    scratch = tempfile.mkdtemp(prefix="faac-bench-")
+    atexit.register(shutil.rmtree, scratch, True)
+    ctx = multiprocessing.get_context("spawn")
+    failed = False
+    for profile in PROFILES:
+        db_path = os.path.join(scratch, f"{profile}.db")
+        build_database(db_path, years)
+        app = _app(db_path, profile)
+        urls = read_urls(db_path)
+        with app.app_context():
+            from app import db
+            journal = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+            db.session.remove()
+
+        quiet = read_load(app, urls, readers, seconds)
+        started, results = ctx.Event(), ctx.Queue()
+        proc = ctx.Process(target=writer, args=(db_path, profile, seconds, started, results))
+        proc.start()
+        started.wait(timeout=120)
+        busy = read_load(app, urls, readers, seconds)
+        ingests = results.get(timeout=seconds + 120)
+        proc.join()
+
+        print(f"{profile} profile ({journal} journal), {readers} reader threads:")
+        print(f"  quiet:          {_summary(*quiet)}")
+        print(f"  during ingests: {_summary(*busy)}")
+        print(f"  ingests:        {len(ingests)} full months, "
+              f"{sum(ingests) / max(len(ingests), 1) * 1000:.0f} ms mean, {max(ingests, default=0) * 1000:.0f} ms max")
+        if profile == "web":
+            _, errors, probes, blocked = busy
+            failed = errors > 0 or blocked > 0 or not probes
+
+    if failed:
+        print("FAIL: with the web profile, no read may fail or wait on the writer during ingests")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+bench_export.py - Stream the full allocation export as CSV and gzipped
+NDJSON while the history grows, and check that peak memory stays flat.
+
+Earlier years are filled by copying the seeded months back in time, so the
+dataset grows by the seeded span on every step.
+
+Usage:
+    python benchmarks/bench_export.py [--steps N]
+"""
+
+import atexit
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="faac-bench-")
+atexit.register(shutil.rmtree, SCRATCH_DIR, True)
+os.environ["DATABASE_URL"] = f"sqlite:///{SCRATCH_DIR}/bench.db"
+os.environ["DB_SNAPSHOT_PATH"] = os.path.join(SCRATCH_DIR, "no-snapshot.db")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app import FAACAllocation, create_app, db, init_db, iter_export  # noqa: E402
+
+# Peak memory at the largest size may exceed the smallest by at most this factor
+MAX_MEMORY_GROWTH = 1.5
+
+
+def _extend_history(first_year, shift_years):
+    """Copy the seeded allocation rows (from first_year on) shift_years earlier."""
+    db.session.execute(db.text(
+        "INSERT INTO faac_allocations (state_id, lga_id, year, month, statutory_allocation,"
+        " vat_allocation, total_gross, deductions, net_allocation)"
+        " SELECT state_id, lga_id, year - :shift, month, statutory_allocation, vat_allocation,"
+        " total_gross, deductions, net_allocation FROM faac_allocations WHERE year >= :first"
+    ), {"shift": shift_years, "first": first_year})
+    db.session.commit()
+
+
+def _measure(fmt, compress):
+    """Return (seconds, bytes written, peak traced bytes) for one full export."""
+    start = time.perf_counter()
+    size = sum(len(chunk) for chunk in iter_export("allocations", fmt, compress))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in iter_export("allocations", fmt, compress):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, size, peak
+
+
+def main():
+    steps = int(sys.argv[sys.argv.index("--steps") + 1]) if "--steps" in sys.argv else 4
+    app = create_app()
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_db(app)
+
+    peaks = {}
+    with app.app_context():
+        first, last = db.session.query(db.func.min(FAACAllocation.year), db.func.max(FAACAllocation.year)).one()
+        span = last - first + 1
+        for step in range(steps):
+            if step:
+                _extend_history(first, span * step)
+            rows = FAACAllocation.query.count()
+            for fmt, compress in (("csv", False), ("ndjson", True)):
+                elapsed, size, peak = _measure(fmt, compress)
+                peaks.setdefault((fmt, compress), []).append(peak)
+                label = f"{fmt}{'.gz' if compress else ''}"
+                print(f"{rows:>8} rows  {label:<9} {elapsed:6.3f}s  {rows / elapsed:>9,.0f} rows/sec  "
+                      f"{size / 1024 / 1024:6.1f} MB out  {peak / 1024 / 1024:5.2f} MB peak")
+
+    growth = max(p[-1] / p[0] for p in peaks.values())
+    print(f"Peak memory growth from smallest to largest dataset: {growth:.2f}x "
+          f"(limit {MAX_MEMORY_GROWTH}x)")
+    if growth > MAX_MEMORY_GROWTH:
+        print("FAIL: export memory grows with the dataset")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
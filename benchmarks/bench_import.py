@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+bench_import.py - Measure the import cost of the web-serving path
+(`import app; app.create_app()`) with `python -X importtime`, against the
+floor of importing Flask and Flask-SQLAlchemy alone, and check that
+scraper-only dependencies stay out of it.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat N]
+"""
+
+import atexit
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCRATCH_DIR = tempfile.mkdtemp(prefix="faac-bench-")
+atexit.register(shutil.rmtree, SCRATCH_DIR, True)
+
+# Budget for what the app adds on top of the framework imports
+TARGET_OVERHEAD_MS = 150
+# Only the scraper, scheduler and seeder need these
+LAZY_MODULES = ("openpyxl", "requests", "apscheduler", "numpy")
+APP_SNIPPET = "import app; app.create_app()"
+FLOOR_SNIPPET = "import flask, flask_sqlalchemy"
+
+
+def _import_profile(snippet):
+    """Run snippet in a fresh interpreter; return (total import ms, set of modules imported)."""
+    # Cache bytecode in the scratch dir, as a deployed app would have .pyc files
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{SCRATCH_DIR}/bench.db",
+               PYTHONPYCACHEPREFIX=os.path.join(SCRATCH_DIR, "pycache"))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", snippet],
+                          cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    total_us, modules = 0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        if not name.startswith("  "):  # nested imports are counted in their parents
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def main():
+    repeat = int(sys.argv[sys.argv.index("--repeat") + 1]) if "--repeat" in sys.argv else 5
+    _import_profile(APP_SNIPPET)  # warm the bytecode cache
+    _import_profile(FLOOR_SNIPPET)
+    app_runs, floor_runs = [], []
+    for _ in range(repeat):  # interleaved, so machine noise hits both alike
+        app_runs.append(_import_profile(APP_SNIPPET))
+        floor_runs.append(_import_profile(FLOOR_SNIPPET))
+
+    app_ms = min(ms for ms, _ in app_runs)
+    floor_ms = min(ms for ms, _ in floor_runs)
+    overhead_ms = app_ms - floor_ms
+    lazy_loaded = sorted({mod.split(".")[0] for _, modules in app_runs for mod in modules
+                          if mod.split(".")[0] in LAZY_MODULES})
+
+    print(f"Web path:   {app_ms:.0f} ms to import app and build it (best of {repeat})")
+    print(f"Framework:  {floor_ms:.0f} ms for Flask and Flask-SQLAlchemy alone")
+    print(f"App adds:   {overhead_ms:.0f} ms (target under {TARGET_OVERHEAD_MS} ms)")
+    print(f"Scraper-only modules imported: {', '.join(lazy_loaded) or 'none'}")
+    if lazy_loaded or overhead_ms > TARGET_OVERHEAD_MS:
+        print(f"FAIL: none of {', '.join(LAZY_MODULES)} may be imported, "
+              f"and the app may add at most {TARGET_OVERHEAD_MS} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
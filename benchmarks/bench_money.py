@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+bench_money.py - Time national totals over integer kobo columns against the
+same amounts held as naira floats, in SQLite and NumPy, and check that the
+stored amounts reconcile exactly.
+
+The database is a synthetic history (seed_data's history mode). Two narrow
+copies of the net amounts are summed: one as stored, one as REAL naira
+standing in for the old Float columns. The reconciliation also runs on a
+copy rewritten in the old layout (naira floats with sub-kobo fractions,
+gross and net summed in float) after upgrade_db has converted it.
+
+Usage:
+    python benchmarks/bench_money.py [--years N] [--repeat N]
+"""
+
+import atexit
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="faac-bench-")
+atexit.register(shutil.rmtree, SCRATCH_DIR, True)
+os.environ["DATABASE_URL"] = f"sqlite:///{SCRATCH_DIR}/bench.db"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+
+from app import KOBO_PER_NAIRA, NationalMonthlyTotal, create_app, db, kobo, upgrade_db  # noqa: E402
+from seed_data import seed  # noqa: E402
+
+
+def _arg(name, default):
+    return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+def _best(func, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+def _sql(statement):
+    return lambda: db.session.execute(db.text(statement)).all()
+
+
+def build_float_database(source, path):
+    """Copy source to path in the layout from before the kobo conversion.
+
+    Money columns become naira floats carrying up to half a kobo of noise,
+    with gross and net summed in float, as rows written by the old code were.
+    """
+    conn = sqlite3.connect(source)
+    conn.execute("VACUUM INTO ?", (path,))
+    conn.close()
+    noise = "(random() % 500) / 100000.0"
+    conn = sqlite3.connect(path)
+    with conn:
+        for table in ("faac_allocations", "igr"):
+            ddl = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                               (table,)).fetchone()[0]
+            conn.execute(f"ALTER TABLE {table} RENAME TO _{table}_kobo")
+            conn.execute(ddl.replace(" BIGINT", " FLOAT"))
+        conn.execute(
+            "INSERT INTO faac_allocations (id, state_id, lga_id, month, year, statutory_allocation,"
+            " vat_allocation, total_gross, deductions, net_allocation)"
+            " SELECT id, state_id, lga_id, month, year, s, v, s + v, d, s + v - d FROM ("
+            f" SELECT *, statutory_allocation * 1.0 / {KOBO_PER_NAIRA} + {noise} AS s,"
+            f" vat_allocation * 1.0 / {KOBO_PER_NAIRA} + {noise} AS v,"
+            f" deductions * 1.0 / {KOBO_PER_NAIRA} + {noise} AS d FROM _faac_allocations_kobo)")
+        conn.execute("INSERT INTO igr (id, state_id, year, quarter, amount)"
+                     f" SELECT id, state_id, year, quarter, amount * 1.0 / {KOBO_PER_NAIRA} + {noise}"
+                     " FROM _igr_kobo")
+        conn.execute("DROP TABLE _faac_allocations_kobo")
+        conn.execute("DROP TABLE _igr_kobo")
+    conn.close()
+
+
+def reconcile():
+    """Return (rows where the parts don't add up, national rollup months that differ from the state rows)."""
+    unbalanced = db.session.execute(db.text(
+        "SELECT COUNT(*) FROM faac_allocations WHERE total_gross != statutory_allocation + vat_allocation"
+        " OR net_allocation != total_gross - deductions")).scalar()
+    national = dict(((y, m), n) for y, m, n in db.session.query(
+        NationalMonthlyTotal.year, NationalMonthlyTotal.month, kobo(NationalMonthlyTotal.net_allocation)))
+    state_sums = dict(((y, m), n) for y, m, n in db.session.execute(db.text(
+        "SELECT year, month, SUM(net_allocation) FROM faac_allocations WHERE lga_id IS NULL"
+        " GROUP BY year, month")))
+    return unbalanced, sum(national.get(period) != total for period, total in state_sums.items())
+
+
+def main():
+    years, repeat = _arg("--years", 20), _arg("--repeat", 10)
+    app = create_app()
+    with app.app_context():
+        with contextlib.redirect_stdout(io.StringIO()):
+            seed(fresh=True, history=((1, 2026 - years), (1, 2026)))
+        db.session.execute(db.text(
+            "CREATE TABLE kobo_amounts AS SELECT year, month, lga_id, net_allocation FROM faac_allocations"))
+        db.session.execute(db.text(
+            f"CREATE TABLE naira_amounts AS SELECT year, month, lga_id,"
+            f" CAST(net_allocation AS REAL) / {KOBO_PER_NAIRA} AS net_allocation FROM faac_allocations"))
+        db.session.commit()
+        rows = db.session.execute(db.text("SELECT COUNT(*) FROM faac_allocations")).scalar()
+
+        monthly = "SELECT year, month, SUM(net_allocation) FROM {} GROUP BY year, month ORDER BY year, month"
+        int_ms, exact = _best(_sql(monthly.format("kobo_amounts")), repeat)
+        real_ms, drifting = _best(_sql(monthly.format("naira_amounts")), repeat)
+        drift = max(abs(round(total * KOBO_PER_NAIRA) - kobo_total)
+                    for (_, _, kobo_total), (_, _, total) in zip(exact, drifting))
+
+        kobo_values = np.array(db.session.execute(db.text(
+            "SELECT net_allocation FROM faac_allocations")).scalars().all(), dtype=np.int64)
+        naira_values = kobo_values / KOBO_PER_NAIRA
+        np_int_ms, np_exact = _best(kobo_values.sum, repeat)
+        np_float_ms, np_total = _best(naira_values.sum, repeat)
+        py_total = sum(naira_values.tolist())
+
+        # Reconciliation: stored parts add up and the national rollups match the raw rows
+        unbalanced, mismatched = reconcile()
+        db.session.remove()
+
+    float_path = os.path.join(SCRATCH_DIR, "float-era.db")
+    build_float_database(os.path.join(SCRATCH_DIR, "bench.db"), float_path)
+    migrated_app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{float_path}",
+                               "DB_SNAPSHOT_PATH": float_path + ".no-snapshot"})
+    with migrated_app.app_context():
+        upgrade_db()
+        migrated_unbalanced, migrated_mismatched = reconcile()
+
+    print(f"Dataset:  {rows} allocation rows over {len(exact)} months")
+    print(f"SQLite:   monthly SUM {int_ms:.1f} ms over integer kobo, {real_ms:.1f} ms over REAL naira; "
+          f"REAL drifts by up to {drift} kobo")
+    print(f"NumPy:    total {np_int_ms:.3f} ms over int64 kobo, {np_float_ms:.3f} ms over float64 naira; "
+          f"float64 off by {abs(round(np_total * KOBO_PER_NAIRA) - int(np_exact))} kobo, "
+          f"a plain Python sum by {abs(round(py_total * KOBO_PER_NAIRA) - int(np_exact))} kobo")
+    print(f"Reconcile: {unbalanced} rows where gross != statutory + VAT or net != gross - deductions, "
+          f"{mismatched} national rollup months that differ from the state rows (best of {repeat})")
+    print(f"Migrated:  {migrated_unbalanced} such rows and {migrated_mismatched} such months after "
+          f"upgrade_db converted a copy holding naira floats")
+    if unbalanced or mismatched or migrated_unbalanced or migrated_mismatched:
+        print("FAIL: stored amounts must reconcile exactly")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+bench_parser.py - Parse a synthetic NBS-style workbook (37 states plus every
+LGA repeated across several wide sheets) and report rows/sec and peak memory.
+
+Usage:
+    python benchmarks/bench_parser.py [--sheets N] [--extra-columns N]
+"""
+
+import atexit
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="faac-bench-")
+atexit.register(shutil.rmtree, SCRATCH_DIR, True)
+os.environ["DATABASE_URL"] = f"sqlite:///{SCRATCH_DIR}/bench.db"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from openpyxl import Workbook, load_workbook  # noqa: E402
+
+from app import create_app, init_db, _build_lga_lookup, _build_state_lookup, _parse_workbook_bytes  # noqa: E402
+from seed_data import LGAS_DATA, STATES_DATA  # noqa: E402
+
+
+def _arg(name, default):
+    return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+def build_workbook(lga_sheets, extra_columns):
+    """Return (xlsx bytes, data row count) for a synthetic disbursement workbook."""
+    wb = Workbook(write_only=True)
+    filler = [f"Memo {i}" for i in range(extra_columns)]
+    rows = 0
+
+    ws = wb.create_sheet("States")
+    ws.append(["FAAC Disbursement (synthetic)"])
+    ws.append([])
+    ws.append(["S/N", "State", "Statutory Allocation", "VAT", "Deductions", "Net Allocation"] + filler)
+    for i, (name, _, _) in enumerate(STATES_DATA, start=1):
+        ws.append([i, name, 9.0e9 + i, 4.0e9 + i, 1.0e9, 1.2e10 + i] + [i] * extra_columns)
+        rows += 1
+    ws.append([None, "Total", 0, 0, 0, 0])
+
+    for sheet in range(1, lga_sheets + 1):
+        ws = wb.create_sheet(f"LGAs {sheet}")
+        ws.append(["State", "LGA", "Statutory", "VAT", "Deductions", "Net"] + filler)
+        for state_name, lga_names in LGAS_DATA.items():
+            for j, lga_name in enumerate(lga_names):
+                ws.append([state_name, lga_name.upper(), 3.0e8 + j, 1.5e8, 3.0e7, 4.2e8 + sheet]
+                          + [j] * extra_columns)
+                rows += 1
+
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue(), rows
+
+
+def main():
+    lga_sheets = _arg("--sheets", 14)
+    extra_columns = _arg("--extra-columns", 20)
+    content, rows = build_workbook(lga_sheets, extra_columns)
+
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        state_lookup = _build_state_lookup()
+        lga_lookup = _build_lga_lookup()
+
+    # Baseline: openpyxl alone, iterating every row of every sheet
+    start = time.perf_counter()
+    wb = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    for ws in wb.worksheets:
+        for _ in ws.iter_rows(values_only=True):
+            pass
+    wb.close()
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    records = _parse_workbook_bytes(content, state_lookup, lga_lookup)
+    elapsed = time.perf_counter() - start
+
+    # Separate run for memory: tracemalloc slows everything down
+    tracemalloc.start()
+    _parse_workbook_bytes(content, state_lookup, lga_lookup)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    states = sum(1 for rec in records if rec["lga_id"] is None)
+    print(f"Workbook:    {len(content) / 1024:.0f} KB, {lga_sheets + 1} sheets, "
+          f"{rows} data rows, {6 + extra_columns} columns")
+    print(f"Parsed:      {states} states, {len(records) - states} LGAs")
+    print(f"Time:        {elapsed:.3f}s ({rows / elapsed:,.0f} rows/sec)")
+    print(f"openpyxl:    {baseline:.3f}s to read every row with no parsing")
+    print(f"Peak memory: {peak / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+bench_routes.py - Load-test the public routes through a local gunicorn with
+databases holding 1x, 10x and 100x the seeded allocation history.
+
+Each scale is a synthetic history (seed_data's history mode, seeded by the
+scale) ending with the seeded months and spanning that many times as long,
+kept in --db-dir for later runs. For each
+scale a gunicorn serves the database while --clients threads send
+--requests requests to each route, cycling through many states, LGAs,
+comparisons and search prefixes. The page cache is off unless --cached is
+given, so the numbers show the queries and templates rather than cache hits.
+
+Throughput and p50/p95/p99 latency per route are printed and written to a
+JSON file. --compare OLD.json reports p95 changes against an earlier run and
+fails on regressions.
+
+Usage:
+    python benchmarks/bench_routes.py [--scales 1,10,100] [--workers N] [--clients N]
+        [--requests N] [--cached] [--db-dir DIR] [--output FILE] [--compare FILE]
+"""
+
+import contextlib
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import quote, urlencode
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+SEEDED_MONTHS = 16  # Oct 2024 - Jan 2026
+# A route regresses when its p95 grows by more than this factor against --compare
+REGRESSION_FACTOR = 1.25
+
+
+def _arg(name, default, cast=int):
+    return cast(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+
+def build_database(path, scale):
+    """Seed path with a synthetic history of scale times the seeded span, ending Jan 2026."""
+    from app import create_app, init_db
+    from seed_data import seed
+
+    start = 2026 * 12 + 1 - scale * SEEDED_MONTHS  # year * 12 + month - 1 of the first month
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+                      "DB_SNAPSHOT_PATH": path + ".no-snapshot"})
+    with contextlib.redirect_stdout(io.StringIO()):
+        with app.app_context():
+            seed(fresh=True, history=((start % 12 + 1, start // 12), (1, 2026)), seed_value=scale)
+        init_db(app)
+
+
+def route_urls(db_path, count=200):
+    """{route: [urls]} with up to `count` distinct URLs per route."""
+    import sqlite3
+    conn = sqlite3.connect(db_path)
+    try:
+        states = [r[0] for r in conn.execute("SELECT name FROM states ORDER BY name")]
+        lgas = conn.execute(
+            "SELECT states.name, lgas.name, lgas.state_id FROM lgas JOIN states ON states.id = lgas.state_id"
+            " ORDER BY lgas.id").fetchall()
+    finally:
+        conn.close()
+    rng = random.Random(0)
+    sample = rng.sample(lgas, min(count, len(lgas)))
+    prefixes = sorted({name[:n].lower() for _, name, _ in lgas for n in (2, 3, 4)})
+    return {
+        "index": ["/"],
+        "state_detail": [f"/state/{quote(s)}" for s in states],
+        "lga_detail": [f"/lga/{quote(s)}/{quote(lga)}" for s, lga, _ in sample],
+        "compare": ["/compare?" + urlencode({"states": rng.sample(states, 3)}, doseq=True)
+                    for _ in range(count)],
+        "api_search": ["/api/search?" + urlencode({"q": q}) for q in rng.sample(prefixes, min(count, len(prefixes)))],
+        "api_lgas": [f"/api/lgas/{state_id}" for state_id in sorted({sid for _, _, sid in lgas})],
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def gunicorn(db_path, workers, cached, log_path):
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", DB_SNAPSHOT_PATH=db_path + ".no-snapshot")
+    if not cached:
+        env["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "app:create_web_app()", "--bind", f"127.0.0.1:{port}",
+             "--workers", str(workers), "--timeout", "300"],
+            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.monotonic() + 300
+        while True:
+            try:
+                if _get(port, "/")[0] == 200:
+                    break
+            except OSError:
+                pass
+            if proc.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"gunicorn did not start; see {log_path}")
+            time.sleep(0.5)
+        yield port
+    finally:
+        proc.terminate()
+        proc.wait(timeout=60)
+
+
+def _get(port, url):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        conn.request("GET", url)
+        resp = conn.getresponse()
+        resp.read()
+        return resp.status, resp
+    finally:
+        conn.close()
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def load_route(port, urls, requests, clients):
+    """Send `requests` GETs cycling through urls from `clients` threads."""
+    # Warm every worker: analytics and the search index are built on first use.
+    for url in urls[:clients]:
+        _get(port, url)
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def client():
+        nonlocal errors
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            try:
+                ok = _get(port, urls[i % len(urls)])[0] == 200
+            except OSError:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                errors += not ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        for _ in range(clients):
+            pool.submit(client)
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "urls": len(urls),
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new):
+    """Print p95 changes per scale and route; return the list of regressions."""
+    regressions = []
+    print(f"\nAgainst {old['meta'].get('git_commit')} ({old['meta'].get('timestamp')}):")
+    for scale, result in new["scales"].items():
+        before = old["scales"].get(scale)
+        if not before:
+            continue
+        for route, stats in result["routes"].items():
+            prev = before["routes"].get(route)
+            if not prev:
+                continue
+            ratio = stats["p95_ms"] / prev["p95_ms"] if prev["p95_ms"] else 1.0
+            flag = "  REGRESSION" if ratio > REGRESSION_FACTOR else ""
+            print(f"  {scale:>4}x {route:<14} p95 {prev['p95_ms']:8.2f} -> {stats['p95_ms']:8.2f} ms "
+                  f"({ratio:.2f}x){flag}")
+            if flag:
+                regressions.append((scale, route))
+    return regressions
+
+
+def main():
+    scales = [int(s) for s in _arg("--scales", "1,10,100", str).split(",")]
+    workers, clients, requests = _arg("--workers", 4), _arg("--clients", 16), _arg("--requests", 400)
+    cached = "--cached" in sys.argv
+    db_dir = _arg("--db-dir", os.path.join(tempfile.gettempdir(), "faac-bench-routes"), str)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    output = _arg("--output", os.path.join(ROOT, "benchmarks", "results", f"routes-{stamp}.json"), str)
+    os.makedirs(db_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    results = {
+        "meta": {"timestamp": stamp, "git_commit": _git_commit(), "python": platform.python_version(),
+                 "workers": workers, "clients": clients, "requests_per_route": requests, "cached": cached},
+        "scales": {},
+    }
+    for scale in scales:
+        db_path = os.path.join(db_dir, f"routes-{scale}x.db")
+        if not os.path.exists(db_path):
+            start = time.perf_counter()
+            build_database(db_path, scale)
+            print(f"Built {scale}x database in {time.perf_counter() - start:.1f}s")
+        import sqlite3
+        conn = sqlite3.connect(db_path)
+        rows, months = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT year * 12 + month) FROM faac_allocations").fetchone()
+        conn.close()
+        urls = route_urls(db_path)
+
+        scale_result = {"allocation_rows": rows, "months": months,
+                        "db_mb": round(os.path.getsize(db_path) / 1024 / 1024, 1), "routes": {}}
+        print(f"\n{scale}x: {rows} allocation rows over {months} months, {scale_result['db_mb']} MB")
+        print(f"  {'route':<14} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        with gunicorn(db_path, workers, cached, os.path.join(db_dir, f"gunicorn-{scale}x.log")) as port:
+            for route, route_list in urls.items():
+                stats = load_route(port, route_list, requests, clients)
+                scale_result["routes"][route] = stats
+                print(f"  {route:<14} {stats['throughput_rps']:>8} {stats['p50_ms']:>9} "
+                      f"{stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['errors']:>7}")
+        results["scales"][str(scale)] = scale_result
+
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nWrote {output}")
+
+    failed = any(r["errors"] for s in results["scales"].values() for r in s["routes"].values())
+    if "--compare" in sys.argv:
+        with open(_arg("--compare", None, str)) as f:
+            failed |= bool(compare(json.load(f), results))
+    if failed:
+        print("FAIL: requests failed or a route regressed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
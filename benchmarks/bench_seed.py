@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+bench_seed.py - Time seed_data.seed() in ORM and bulk mode against a scratch
+SQLite database, and check that bulk seeding is reproducible.
+
+Usage:
+    python benchmarks/bench_seed.py [--repeat N]
+"""
+
+import atexit
+import contextlib
+import hashlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix="faac-bench-")
+atexit.register(shutil.rmtree, SCRATCH_DIR, True)
+os.environ["DATABASE_URL"] = f"sqlite:///{SCRATCH_DIR}/bench.db"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app import create_app, db  # noqa: E402
+from seed_data import seed  # noqa: E402
+
+TARGET_SECONDS = 1.0
+
+
+def _timed_seed(bulk):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        seed(fresh=True, bulk=bulk)
+        return time.perf_counter() - start
+
+
+def _allocation_digest():
+    digest = hashlib.sha256()
+    rows = db.session.execute(db.text(
+        "SELECT state_id, lga_id, year, month, statutory_allocation, vat_allocation,"
+        " total_gross, deductions, net_allocation FROM faac_allocations"
+        " ORDER BY state_id, lga_id, year, month"
+    ))
+    for row in rows:
+        digest.update(repr(tuple(row)).encode())
+    return digest.hexdigest()
+
+
+def main():
+    repeat = int(sys.argv[sys.argv.index("--repeat") + 1]) if "--repeat" in sys.argv else 3
+    with create_app().app_context():
+        orm = min(_timed_seed(bulk=False) for _ in range(repeat))
+        bulk_times, digests = [], set()
+        for _ in range(repeat):
+            bulk_times.append(_timed_seed(bulk=True))
+            digests.add(_allocation_digest())
+        bulk = min(bulk_times)
+
+    print(f"ORM seed:  {orm:.3f}s (best of {repeat})")
+    print(f"Bulk seed: {bulk:.3f}s (best of {repeat}), {orm / bulk:.1f}x faster")
+    print(f"Bulk output reproducible: {'yes' if len(digests) == 1 else 'NO'}")
+    if len(digests) != 1 or bulk > TARGET_SECONDS:
+        print(f"FAIL: target is a reproducible bulk seed under {TARGET_SECONDS:.1f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
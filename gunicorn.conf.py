@@ -0,0 +1,13 @@
+"""Gunicorn settings; gunicorn reads this file from the working directory."""
+
+import os
+
+
+def on_starting(server):
+    """Prepare the database once in the master, before any worker boots."""
+    from app import create_app, db, init_db
+    app = create_app({'DB_PROFILE': os.environ.get('DB_PROFILE', 'web')})
+    init_db(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()  # workers are forked; they open their own connections
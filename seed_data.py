@@ -5,11 +5,24 @@ fiscal data including all 36 states + FCT, 774 LGAs, FAAC allocations for
 Oct 2024 - Jan 2026, and 2023-2025 IGR data.
 
 Usage:
-    python seed_data.py
+    python seed_data.py           # row-by-row ORM seeding
+    python seed_data.py --bulk    # vectorised NumPy + executemany seeding
+    python seed_data.py --history 1990-01 2026-01 [--seed N] [--database PATH]
+                                  # synthetic history over any span of months
 """
 
+import argparse
+import os
 import random
-from app import app, db, State, LGA, FAACAllocation, IGR
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import (
+    create_app, db, State, LGA, FAACAllocation, IGR, DataVersion, KOBO_PER_NAIRA, MONTH_NAMES, from_kobo, to_kobo,
+    invalidate_search_index, rebuild_rollups, bump_data_version,
+)
 
 # ---------------------------------------------------------------------------
 # 1. STATE DATA: name, code, geo_zone
@@ -535,6 +548,21 @@ def vary(base, pct=0.05):
     return base * random.uniform(1 - pct, 1 + pct)
 
 
+def _kobo_split(net, gross, statutory):
+    """
+    Round a net / gross / statutory split to whole kobo and derive VAT and
+    deductions from it, so the five columns add up exactly once stored.
+    """
+    net, gross, statutory = to_kobo(net), to_kobo(gross), to_kobo(statutory)
+    return {
+        "statutory_allocation": from_kobo(statutory),
+        "vat_allocation": from_kobo(gross - statutory),
+        "total_gross": from_kobo(gross),
+        "deductions": from_kobo(gross - net),
+        "net_allocation": from_kobo(net),
+    }
+
+
 def generate_faac_for_state(state_name, month, year):
     """
     Generate a realistic FAAC allocation row for a state.
@@ -556,20 +584,12 @@ def generate_faac_for_state(state_name, month, year):
     # deductions are typically 8-12% of gross => net = gross * (1 - ded_rate)
     ded_rate = random.uniform(0.08, 0.12)
     total_gross = net_allocation / (1 - ded_rate)
-    deductions = total_gross - net_allocation
 
     # statutory ~60% of gross, vat ~40%
     stat_ratio = random.uniform(0.58, 0.62)
     statutory_allocation = total_gross * stat_ratio
-    vat_allocation = total_gross - statutory_allocation
 
-    return {
-        "statutory_allocation": round(statutory_allocation, 2),
-        "vat_allocation": round(vat_allocation, 2),
-        "total_gross": round(total_gross, 2),
-        "deductions": round(deductions, 2),
-        "net_allocation": round(net_allocation, 2),
-    }
+    return _kobo_split(net_allocation, total_gross, statutory_allocation)
 
 
 def distribute_lga_allocations(state_name, lga_names, state_alloc, month, year):
@@ -605,37 +625,344 @@ def distribute_lga_allocations(state_name, lga_names, state_alloc, month, year):
         # Derive components from the LGA net
         ded_rate = random.uniform(0.06, 0.10)
         lga_gross = lga_net / (1 - ded_rate)
-        lga_ded = lga_gross - lga_net
 
         stat_ratio = random.uniform(0.58, 0.62)
         lga_stat = lga_gross * stat_ratio
-        lga_vat = lga_gross - lga_stat
 
-        results.append({
-            "lga_name": lga_name,
-            "statutory_allocation": round(lga_stat, 2),
-            "vat_allocation": round(lga_vat, 2),
-            "total_gross": round(lga_gross, 2),
-            "deductions": round(lga_ded, 2),
-            "net_allocation": round(lga_net, 2),
-        })
+        results.append({"lga_name": lga_name, **_kobo_split(lga_net, lga_gross, lga_stat)})
 
     return results
 
 
+# ---------------------------------------------------------------------------
+# BULK (VECTORISED) GENERATION
+#    Same distributions as the helpers above, drawn for every state, LGA and
+#    month at once from a seeded NumPy generator.
+# ---------------------------------------------------------------------------
+
+SEED_MONTHS = [(10, 2024), (11, 2024), (12, 2024)]
+SEED_MONTHS += [(m, 2025) for m in range(1, 13)]
+SEED_MONTHS += [(1, 2026)]
+
+# Quarterly IGR distribution factors (slight seasonal variation)
+IGR_Q_FACTORS = {
+    1: 0.22,  # Q1 slightly lower
+    2: 0.25,  # Q2 moderate
+    3: 0.25,  # Q3 moderate
+    4: 0.28,  # Q4 typically higher (year-end push)
+}
+
+ALLOCATION_COLUMNS = (
+    "statutory_allocation", "vat_allocation", "total_gross",
+    "deductions", "net_allocation",
+)
+
+
+def _split_net(rng, net, ded_low, ded_high):
+    """
+    Vectorised net -> (statutory, vat, gross, deductions, net) split. The
+    parts are rounded to whole kobo first, so gross = statutory + vat and
+    net = gross - deductions hold exactly.
+    """
+    ded_rate = rng.uniform(ded_low, ded_high, net.shape)
+    gross = np.round(net / (1 - ded_rate) * KOBO_PER_NAIRA)
+    net = np.round(net * KOBO_PER_NAIRA)
+    statutory = np.round(gross * rng.uniform(0.58, 0.62, net.shape))
+    return {
+        "statutory_allocation": statutory / KOBO_PER_NAIRA,
+        "vat_allocation": (gross - statutory) / KOBO_PER_NAIRA,
+        "total_gross": gross / KOBO_PER_NAIRA,
+        "deductions": (gross - net) / KOBO_PER_NAIRA,
+        "net_allocation": net / KOBO_PER_NAIRA,
+    }
+
+
+def generate_allocation_matrix(rng, months, state_names=None, growth=None, lga_parents=None):
+    """
+    Vectorised counterpart of generate_faac_for_state and
+    distribute_lga_allocations for every state and LGA over `months`.
+
+    growth, if given, is a (months, states) multiplier on the 2024 baselines
+    that replaces the 2025/2026 steps. lga_parents, if given, is a
+    (months, lgas) array that is -1 where an LGA exists and otherwise holds
+    the column of the LGA it was still part of: that LGA gets its share and
+    the missing LGA's entries are NaN.
+
+    Returns (state_cols, lga_cols, lga_state_idx): dicts mapping each
+    ALLOCATION_COLUMNS name to arrays of shape (months, states) and
+    (months, lgas), plus the state index of each LGA column.
+    """
+    if state_names is None:
+        state_names = [name for name, _, _ in STATES_DATA]
+    years = np.array([year for _, year in months])
+    n_months, n_states = len(months), len(state_names)
+
+    # State level: baseline * year-over-year growth * monthly variation
+    net_base = np.array([FAAC_NET_BASELINES.get(name, 5.0 * B) for name in state_names])
+    if growth is None:
+        growth = np.ones((n_months, n_states))
+        in_2025 = years == 2025
+        from_2026 = years >= 2026
+        growth[in_2025] = rng.uniform(1.12, 1.18, (in_2025.sum(), n_states))
+        growth[from_2026] = rng.uniform(1.25, 1.35, (from_2026.sum(), n_states))
+    state_net = net_base * growth * rng.uniform(0.94, 1.06, (n_months, n_states))
+    state_cols = _split_net(rng, state_net, 0.08, 0.12)
+
+    # LGA level: weighted share of 30-38% of the state's net, capital gets a boost
+    lga_state_idx = []
+    is_capital = []
+    for i, name in enumerate(state_names):
+        for lga_name in LGAS_DATA.get(name, []):
+            lga_state_idx.append(i)
+            is_capital.append(lga_name == CAPITAL_LGAS.get(name))
+    lga_state_idx = np.array(lga_state_idx, dtype=np.int64)
+    is_capital = np.array(is_capital, dtype=bool)
+    n_lgas = len(lga_state_idx)
+
+    weights = rng.uniform(0.8, 1.2, (n_months, n_lgas))
+    weights[:, is_capital] *= rng.uniform(1.15, 1.25, (n_months, is_capital.sum()))
+    if lga_parents is not None:
+        merged = lga_parents >= 0
+        rows, cols = np.nonzero(merged)
+        np.add.at(weights, (rows, lga_parents[rows, cols]), weights[rows, cols])
+        weights[merged] = 0
+    weight_totals = np.zeros((n_months, n_states))
+    np.add.at(weight_totals, (slice(None), lga_state_idx), weights)
+    pools = state_cols["net_allocation"] * rng.uniform(0.30, 0.38, (n_months, n_states))
+    lga_net = pools[:, lga_state_idx] * weights / weight_totals[:, lga_state_idx]
+    lga_cols = _split_net(rng, lga_net, 0.06, 0.10)
+    if lga_parents is not None:
+        for values in lga_cols.values():
+            values[merged] = np.nan
+
+    return state_cols, lga_cols, lga_state_idx
+
+
+def generate_igr_matrix(rng, igr_datasets, state_names):
+    """Return quarterly IGR amounts of shape (years, states, 4)."""
+    annual = np.array([[data.get(name, 10.0 * B) for name in state_names]
+                       for _, data in igr_datasets])
+    factors = np.array([IGR_Q_FACTORS[q] for q in range(1, 5)])
+    amounts = annual[:, :, None] * factors * rng.uniform(0.95, 1.05, annual.shape + (4,))
+    return np.round(amounts, 2)
+
+
+def bulk_insert_allocations(state_ids, lga_ids, months, state_cols, lga_cols, lga_state_idx):
+    """
+    Insert generated allocation matrices with executemany batches, skipping
+    NaN (missing) entries. Returns row count.
+    """
+    state_ids = np.asarray(state_ids)
+    lga_ids = np.asarray(lga_ids)
+    lga_state_ids = state_ids[lga_state_idx].tolist()
+    state_ids = state_ids.tolist()
+    lga_ids = lga_ids.tolist()
+
+    rows = []
+    for m, (month, year) in enumerate(months):
+        cols = [state_cols[c][m].tolist() for c in ALLOCATION_COLUMNS]
+        for state_id, *values in zip(state_ids, *cols):
+            if values[-1] != values[-1]:  # NaN
+                continue
+            row = dict(zip(ALLOCATION_COLUMNS, values))
+            row.update(state_id=state_id, lga_id=None, month=month, year=year)
+            rows.append(row)
+        cols = [lga_cols[c][m].tolist() for c in ALLOCATION_COLUMNS]
+        for state_id, lga_id, *values in zip(lga_state_ids, lga_ids, *cols):
+            if values[-1] != values[-1]:
+                continue
+            row = dict(zip(ALLOCATION_COLUMNS, values))
+            row.update(state_id=state_id, lga_id=lga_id, month=month, year=year)
+            rows.append(row)
+
+    db.session.execute(db.insert(FAACAllocation), rows)
+    return len(rows)
+
+
+def _insert_states_and_lgas():
+    """Bulk-insert every state and LGA. Returns (state_names, state_ids, lga_ids)."""
+    state_names = [name for name, _, _ in STATES_DATA]
+
+    # Explicit ids: seeding always starts from empty tables.
+    print("Seeding states...")
+    state_ids = list(range(1, len(STATES_DATA) + 1))
+    db.session.execute(db.insert(State), [
+        {"id": i, "name": name, "code": code, "geo_zone": zone}
+        for i, (name, code, zone) in zip(state_ids, STATES_DATA)
+    ])
+    print(f"  -> {len(state_ids)} states created.")
+
+    print("Seeding LGAs...")
+    lga_rows = [
+        {"state_id": state_id, "name": lga_name}
+        for state_id, name in zip(state_ids, state_names)
+        for lga_name in LGAS_DATA.get(name, [])
+    ]
+    for i, row in enumerate(lga_rows, start=1):
+        row["id"] = i
+    db.session.execute(db.insert(LGA), lga_rows)
+    lga_ids = [row["id"] for row in lga_rows]
+    print(f"  -> {len(lga_ids)} LGAs created.")
+    return state_names, state_ids, lga_ids
+
+
+def _seed_bulk(seed_value=42):
+    """Seed everything with NumPy-generated data and Core executemany inserts."""
+    rng = np.random.default_rng(seed_value)
+    state_names, state_ids, lga_ids = _insert_states_and_lgas()
+
+    print("Seeding FAAC allocations (Oct 2024 - Jan 2026)...")
+    state_cols, lga_cols, lga_state_idx = generate_allocation_matrix(rng, SEED_MONTHS, state_names)
+    alloc_count = bulk_insert_allocations(state_ids, lga_ids, SEED_MONTHS,
+                                          state_cols, lga_cols, lga_state_idx)
+    print(f"  -> {alloc_count} FAAC allocation records created.")
+
+    print("Seeding IGR 2023 & 2024 data...")
+    igr_datasets = [(2023, IGR_ANNUAL_2023), (2024, IGR_ANNUAL_2024), (2025, IGR_ANNUAL_2025)]
+    amounts = generate_igr_matrix(rng, igr_datasets, state_names).tolist()
+    igr_rows = [
+        {"state_id": state_id, "year": igr_year, "quarter": q + 1, "amount": amount}
+        for (igr_year, _), by_state in zip(igr_datasets, amounts)
+        for state_id, quarters in zip(state_ids, by_state)
+        for q, amount in enumerate(quarters)
+    ]
+    db.session.execute(db.insert(IGR), igr_rows)
+    print(f"  -> {len(igr_rows)} IGR records created.")
+
+    return len(state_ids), len(lga_ids), alloc_count, len(igr_rows)
+
+
+# ---------------------------------------------------------------------------
+# SYNTHETIC HISTORY
+#    Any span of months from the bulk generators: growth curves in place of
+#    the 2025/2026 steps, months that were never published and LGAs carved
+#    out of a neighbour part-way through. Everything is drawn from one seeded
+#    generator, so the same span and seed always give the same database.
+# ---------------------------------------------------------------------------
+
+HISTORY_BLOCK_MONTHS = 120          # months generated and inserted per batch
+HISTORY_ANNUAL_GROWTH = 0.10        # mean yearly growth of FAAC net allocations
+HISTORY_CYCLE_YEARS = 7             # oil price cycle shared by every state
+HISTORY_CYCLE_AMPLITUDE = 0.12
+HISTORY_MISSING_MONTH_RATE = 0.02   # months with no FAAC publication at all
+HISTORY_MISSING_STATE_RATE = 0.01   # state-months missing on their own
+HISTORY_NEW_LGA_RATE = 0.05         # LGAs created during the span
+
+
+def month_span(start, end):
+    """Every (month, year) from start to end inclusive, both (month, year) pairs."""
+    first = start[1] * 12 + start[0] - 1
+    last = end[1] * 12 + end[0] - 1
+    if last < first:
+        raise ValueError(f"{end[1]}-{end[0]:02d} is before {start[1]}-{start[0]:02d}")
+    return [(p % 12 + 1, p // 12) for p in range(first, last + 1)]
+
+
+def history_growth(rng, months, n_states, annual_growth=HISTORY_ANNUAL_GROWTH):
+    """
+    (months, states) multiplier on the 2024 baselines: a compounding trend
+    per state, a cycle shared by all states and a mean-reverting monthly
+    shock. Trend and cycle are 1 at Oct 2024 wherever the span starts.
+    """
+    years = np.array([year * 12 + month - 1 - (2024 * 12 + 9) for month, year in months]) / 12
+    rates = np.log1p(annual_growth + rng.normal(0, 0.02, n_states))
+    trend = np.exp(years[:, None] * rates)
+    phase = rng.uniform(0, 2 * np.pi)
+    cycle = 1 + HISTORY_CYCLE_AMPLITUDE * np.sin(2 * np.pi * years / HISTORY_CYCLE_YEARS + phase)
+    cycle /= 1 + HISTORY_CYCLE_AMPLITUDE * np.sin(phase)
+    shocks = rng.normal(0, 0.02, (len(months), n_states))
+    for m in range(1, len(months)):
+        shocks[m] += 0.9 * shocks[m - 1]
+    return trend * cycle[:, None] * np.exp(shocks)
+
+
+def history_lga_parents(rng, n_months, state_names, rate=HISTORY_NEW_LGA_RATE):
+    """
+    (months, lgas) parent map for generate_allocation_matrix: a `rate` share
+    of non-capital LGAs is created in a random month and before that is part
+    of another LGA of the same state.
+    """
+    lga_state_idx, is_capital = [], []
+    for i, name in enumerate(state_names):
+        for lga_name in LGAS_DATA.get(name, []):
+            lga_state_idx.append(i)
+            is_capital.append(lga_name == CAPITAL_LGAS.get(name))
+    lga_state_idx = np.array(lga_state_idx, dtype=np.int64)
+    n_lgas = len(lga_state_idx)
+
+    is_new = (rng.random(n_lgas) < rate) & ~np.array(is_capital, dtype=bool)
+    parents = np.full((n_months, n_lgas), -1, dtype=np.int64)
+    for lga, created in zip(np.flatnonzero(is_new), rng.integers(0, n_months, is_new.sum())):
+        siblings = np.flatnonzero((lga_state_idx == lga_state_idx[lga]) & ~is_new)
+        if len(siblings):
+            parents[:created, lga] = rng.choice(siblings)
+    return parents
+
+
+def history_missing(rng, n_months, n_states):
+    """(months, states) mask of unpublished allocations. The last month is always complete."""
+    missing = (rng.random(n_months) < HISTORY_MISSING_MONTH_RATE)[:, None]
+    missing = missing | (rng.random((n_months, n_states)) < HISTORY_MISSING_STATE_RATE)
+    missing[-1] = False
+    return missing
+
+
+def _seed_history(start, end, seed_value=42):
+    """Seed a synthetic history from start to end, (month, year) pairs, in bulk."""
+    rng = np.random.default_rng(seed_value)
+    months = month_span(start, end)
+    state_names, state_ids, lga_ids = _insert_states_and_lgas()
+
+    growth = history_growth(rng, months, len(state_names))
+    lga_parents = history_lga_parents(rng, len(months), state_names)
+    missing = history_missing(rng, len(months), len(state_names))
+
+    print(f"Seeding FAAC allocations ({MONTH_NAMES[start[0]]} {start[1]} - {MONTH_NAMES[end[0]]} {end[1]})...")
+    alloc_count = 0
+    for i in range(0, len(months), HISTORY_BLOCK_MONTHS):
+        block = slice(i, i + HISTORY_BLOCK_MONTHS)
+        state_cols, lga_cols, lga_state_idx = generate_allocation_matrix(
+            rng, months[block], state_names, growth[block], lga_parents[block])
+        for values in state_cols.values():
+            values[missing[block]] = np.nan
+        for values in lga_cols.values():
+            values[missing[block][:, lga_state_idx]] = np.nan
+        alloc_count += bulk_insert_allocations(state_ids, lga_ids, months[block],
+                                               state_cols, lga_cols, lga_state_idx)
+    print(f"  -> {alloc_count} FAAC allocation records created.")
+
+    # IGR follows each state's FAAC growth, for every year the span completes
+    years = np.array([year for _, year in months])
+    igr_years = range(start[1] + (start[0] != 1), end[1] + (end[0] == 12))
+    print(f"Seeding IGR {igr_years[0]} - {igr_years[-1]} data..." if igr_years else "Seeding IGR data...")
+    igr_datasets = [
+        (igr_year, {name: IGR_ANNUAL_2024.get(name, 10.0 * B) * factor
+                    for name, factor in zip(state_names, growth[years == igr_year].mean(axis=0))})
+        for igr_year in igr_years
+    ]
+    igr_rows = []
+    if igr_datasets:
+        amounts = generate_igr_matrix(rng, igr_datasets, state_names).tolist()
+        igr_rows = [
+            {"state_id": state_id, "year": igr_year, "quarter": q + 1, "amount": amount}
+            for (igr_year, _), by_state in zip(igr_datasets, amounts)
+            for state_id, quarters in zip(state_ids, by_state)
+            for q, amount in enumerate(quarters)
+        ]
+        db.session.execute(db.insert(IGR), igr_rows)
+    print(f"  -> {len(igr_rows)} IGR records created.")
+
+    return len(state_ids), len(lga_ids), alloc_count, len(igr_rows)
+
+
 # ---------------------------------------------------------------------------
 # MAIN SEEDING LOGIC
 # ---------------------------------------------------------------------------
 
-def seed(fresh=False):
+def _seed_orm():
+    """Seed everything one ORM object at a time (the original seeding path)."""
     random.seed(42)  # Reproducible data
 
-    if fresh:
-        print("Dropping all tables...")
-        db.drop_all()
-        print("Creating all tables...")
-        db.create_all()
-
     # ------------------------------------------------------------------
     # Step 1: Create States
     # ------------------------------------------------------------------
@@ -671,12 +998,9 @@ def seed(fresh=False):
     # Step 3: FAAC Allocations (Oct-Dec 2024 + Jan-Dec 2025)
     # ------------------------------------------------------------------
     print("Seeding FAAC allocations (Oct 2024 - Jan 2026)...")
-    months = [(10, 2024), (11, 2024), (12, 2024)]
-    months += [(m, 2025) for m in range(1, 13)]
-    months += [(1, 2026)]
     alloc_count = 0
 
-    for month, year in months:
+    for month, year in SEED_MONTHS:
         for state_name, state_obj in state_objects.items():
             # State-level allocation
             alloc_data = generate_faac_for_state(state_name, month, year)
@@ -724,14 +1048,6 @@ def seed(fresh=False):
     print("Seeding IGR 2023 & 2024 data...")
     igr_count = 0
 
-    # Quarterly distribution factors (slight seasonal variation)
-    q_factors = {
-        1: 0.22,  # Q1 slightly lower
-        2: 0.25,  # Q2 moderate
-        3: 0.25,  # Q3 moderate
-        4: 0.28,  # Q4 typically higher (year-end push)
-    }
-
     igr_datasets = [
         (2023, IGR_ANNUAL_2023),
         (2024, IGR_ANNUAL_2024),
@@ -742,7 +1058,7 @@ def seed(fresh=False):
         for state_name, state_obj in state_objects.items():
             annual = igr_annual_data.get(state_name, 10.0 * B)
             for quarter in range(1, 5):
-                base_quarterly = annual * q_factors[quarter]
+                base_quarterly = annual * IGR_Q_FACTORS[quarter]
                 # Add small random variation (+/- 5%)
                 amount = vary(base_quarterly, 0.05)
                 igr = IGR(
@@ -756,15 +1072,59 @@ def seed(fresh=False):
 
     print(f"  -> {igr_count} IGR records created.")
 
+    return len(state_objects), total_lga_count, alloc_count, igr_count
+
+
+def seed(fresh=False, bulk=False, history=None, seed_value=42):
+    """
+    Populate an empty database. bulk=True generates the data with NumPy and
+    inserts it with Core executemany batches, which is much faster than the
+    default row-by-row ORM path; each mode is reproducible on its own.
+
+    history=(start, end), two (month, year) pairs, seeds a synthetic history
+    over that span instead, through the bulk path. Bulk and history data are
+    determined by seed_value.
+    """
+    if fresh:
+        # Carry the data version over the drop, so running workers keyed on it
+        # (page cache, search index, analytics) never mistake the new data for
+        # a version they already hold.
+        try:
+            version = db.session.query(DataVersion.version).filter_by(id=1).scalar() or 0
+        except SQLAlchemyError:
+            version = 0
+        db.session.rollback()
+        print("Dropping all tables...")
+        db.drop_all()
+        print("Creating all tables...")
+        db.create_all()
+        if version:
+            db.session.add(DataVersion(id=1, version=version, updated_at=datetime.utcnow()))
+
+    if history:
+        state_count, lga_count, alloc_count, igr_count = _seed_history(*history, seed_value=seed_value)
+    elif bulk:
+        state_count, lga_count, alloc_count, igr_count = _seed_bulk(seed_value)
+    else:
+        state_count, lga_count, alloc_count, igr_count = _seed_orm()
+
+    # ------------------------------------------------------------------
+    # Monthly rollups
+    # ------------------------------------------------------------------
+    print("Building monthly rollups...")
+    rebuild_rollups()
+    bump_data_version()
+
     # ------------------------------------------------------------------
     # Commit everything
     # ------------------------------------------------------------------
     print("Committing to database...")
     db.session.commit()
+    invalidate_search_index()
     print("=" * 60)
     print("DATABASE SEEDED SUCCESSFULLY!")
-    print(f"  States:           {len(state_objects)}")
-    print(f"  LGAs:             {total_lga_count}")
+    print(f"  States:           {state_count}")
+    print(f"  LGAs:             {lga_count}")
     print(f"  FAAC Allocations: {alloc_count}")
     print(f"  IGR Records:      {igr_count}")
     print("=" * 60)
@@ -774,6 +1134,23 @@ def seed(fresh=False):
 # ENTRY POINT
 # ---------------------------------------------------------------------------
 
+def _parse_month(value):
+    """'YYYY-MM' -> (month, year)."""
+    year, _, month = value.partition("-")
+    if not (year.isdigit() and month.isdigit() and 1 <= int(month) <= 12):
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM, got {value!r}")
+    return int(month), int(year)
+
+
 if __name__ == "__main__":
-    with app.app_context():
-        seed(fresh=True)
+    parser = argparse.ArgumentParser(description="Seed the FAAC Tracker database.")
+    parser.add_argument("--bulk", action="store_true", help="vectorised NumPy + executemany seeding")
+    parser.add_argument("--history", nargs=2, type=_parse_month, metavar=("START", "END"),
+                        help="synthetic history over START to END (YYYY-MM), seeded in bulk")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for --bulk and --history")
+    parser.add_argument("--database", help="SQLite file to seed instead of the configured database")
+    args = parser.parse_args()
+
+    config = {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.abspath(args.database)}"} if args.database else None
+    with create_app(config).app_context():
+        seed(fresh=True, bulk=args.bulk, history=args.history, seed_value=args.seed)
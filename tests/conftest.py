@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app import create_app  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    """An app on an empty scratch SQLite database, schema created, nothing seeded."""
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'faac.db'}",
+        "DB_SNAPSHOT_PATH": str(tmp_path / "no-snapshot.db"),
+        "NBS_CACHE_DIR": str(tmp_path / "nbs_cache"),
+    })
+    from app import db
+    with app.app_context():
+        db.create_all(bind_key=None)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def nbs():
+    """Start a stub NBS server; returns start(routes) -> base URL.
+
+    routes maps a URL path to {'body': bytes or None (404), 'delay': seconds
+    before answering, 'head_status': status for HEAD instead}.
+    """
+    servers = []
+
+    def start(routes):
+        class Handler(BaseHTTPRequestHandler):
+            def _answer(self, head):
+                route = routes.get(self.path, {})
+                time.sleep(route.get("delay", 0))
+                body = route.get("body")
+                status = (route.get("head_status") if head else None) or (200 if body is not None else 404)
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body) if status == 200 else 0))
+                self.end_headers()
+                if not head and status == 200:
+                    self.wfile.write(body)
+
+            def do_HEAD(self):
+                self._answer(head=True)
+
+            def do_GET(self):
+                self._answer(head=False)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
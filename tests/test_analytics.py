@@ -0,0 +1,60 @@
+import contextlib
+import io
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from app import AnalyticsEngine, build_analytics, bump_data_version, db, get_data_version
+
+
+@pytest.fixture
+def seeded(app, monkeypatch):
+    from seed_data import seed
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        seed(history=((1, 2025), (3, 2025)))
+    monkeypatch.setattr(app_module, "_analytics", None)
+    return app
+
+
+def _wait_for_rebuild():
+    deadline = time.monotonic() + 10
+    while app_module._analytics_rebuilding and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not app_module._analytics_rebuilding
+
+
+def test_no_engine_yet_is_unavailable(seeded):
+    client = seeded.test_client()
+    resp = client.get("/api/analytics/state/Lagos")
+    assert resp.status_code == 503 and resp.headers["Retry-After"]
+    _wait_for_rebuild()
+    assert client.get("/api/analytics/state/Lagos").status_code == 200
+
+
+def test_rebuild_after_a_write_is_off_the_request_path(seeded, monkeypatch):
+    """TESTING enforces query budgets, so a rebuild inside a request would fail it."""
+    client = seeded.test_client()
+    with seeded.app_context():
+        old = build_analytics()
+    assert client.get("/state/Lagos").headers.get("ETag")
+
+    release, build = threading.Event(), AnalyticsEngine.build.__func__
+    monkeypatch.setattr(AnalyticsEngine, "build",
+                        classmethod(lambda cls, version: release.wait(10) and build(cls, version)))
+    with seeded.app_context():
+        bump_data_version()
+        db.session.commit()
+        version = get_data_version()
+
+    for _ in range(2):  # served from the previous engine, and never cached or validated
+        resp = client.get("/state/Lagos")
+        assert resp.status_code == 200 and resp.headers["X-Cache"] == "MISS" and "ETag" not in resp.headers
+        assert client.get("/api/analytics/state/Lagos").json == old.entity("state", "Lagos")
+    assert app_module._analytics is old
+
+    release.set()
+    _wait_for_rebuild()
+    assert app_module._analytics.version == version
+    assert client.get("/state/Lagos").headers.get("ETag")
@@ -0,0 +1,62 @@
+"""Scrapes and backfills against a local stub of the NBS site."""
+
+import contextlib
+import io
+from urllib.parse import urlsplit
+
+import pytest
+from openpyxl import Workbook
+
+import app as app_module
+from app import (MONTH_NAMES, NBS_URL_PATTERNS, FAACAllocation, ScrapeLog, State, backfill_faac_data, db,
+                 scrape_faac_data)
+from seed_data import STATES_DATA, _insert_states_and_lgas
+
+
+def _workbook(net):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["S/N", "State", "Statutory Allocation", "VAT", "Deductions", "Net Allocation"])
+    for i, (name, _, _) in enumerate(STATES_DATA, start=1):
+        ws.append([i, name, 9.0e9, 4.0e9, 1.0e9, net])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _path(month, year):
+    return urlsplit(NBS_URL_PATTERNS[0].format(base="", month=MONTH_NAMES[month], year=year)).path
+
+
+@pytest.fixture
+def states(app):
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        _insert_states_and_lgas()
+        db.session.commit()
+    return app
+
+
+def test_backfill_parses_in_spawned_processes(states, nbs, monkeypatch):
+    routes = {_path(1, 2020): {"body": _workbook(1.2e10)}, _path(2, 2020): {"body": _workbook(1.3e10)},
+              _path(3, 2020): {"head_status": 503}}
+    monkeypatch.setattr(app_module, "NBS_BASE_URL", nbs(routes))
+    with states.app_context():
+        summary = backfill_faac_data((2020, 1), (2020, 4), workers=2)
+        assert summary == {"success": 2, "no_data": 1, "unchanged": 0, "failed": 1, "skipped": 0}
+        lagos = db.session.query(FAACAllocation.month, FAACAllocation.net_allocation).join(State).filter(
+            State.name == "Lagos", FAACAllocation.lga_id.is_(None)).order_by(FAACAllocation.month)
+        assert lagos.all() == [(1, 1.2e10), (2, 1.3e10)]
+        assert ScrapeLog.query.filter_by(target_month=3, status="failed").count() == 1
+
+        # The month NBS could not serve was not checkpointed, so a re-run retries it.
+        routes[_path(3, 2020)] = {"body": _workbook(1.4e10)}
+        assert backfill_faac_data((2020, 1), (2020, 4), workers=2) == \
+            {"success": 1, "no_data": 0, "unchanged": 0, "failed": 0, "skipped": 3}
+
+
+def test_unchanged_workbook(states, nbs, monkeypatch):
+    monkeypatch.setattr(app_module, "NBS_BASE_URL", nbs({_path(1, 2020): {"body": _workbook(1.2e10)}}))
+    with states.app_context():
+        assert scrape_faac_data(1, 2020) == "success"
+        assert scrape_faac_data(1, 2020) == "unchanged"
+        assert [log.status for log in ScrapeLog.query.order_by(ScrapeLog.id)] == ["success", "unchanged"]
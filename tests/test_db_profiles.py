@@ -0,0 +1,76 @@
+"""The 'web' database profile: pragmas, read-only routing and reads during writes."""
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import READ_ONLY_BIND, State, create_app, db
+
+
+@pytest.fixture(params=["default", "web"])
+def profile_app(request, tmp_path):
+    database_uri = f"sqlite:///{tmp_path / 'faac.db'}"
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": database_uri, "DB_PROFILE": request.param,
+                      "DB_SNAPSHOT_PATH": str(tmp_path / "no-snapshot.db")})
+    with app.app_context():
+        db.create_all(bind_key=None)
+        db.session.add(State(name="Lagos", code="LA", geo_zone="South West"))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_web_profile_pragmas(profile_app):
+    with profile_app.app_context():
+        pragma = lambda name: db.session.execute(db.text(f"PRAGMA {name}")).scalar()  # noqa: E731
+        if profile_app.config["DB_PROFILE"] == "web":
+            assert pragma("journal_mode") == "wal"
+            assert pragma("synchronous") == 1  # NORMAL
+            assert pragma("busy_timeout") == 5000
+        else:
+            assert pragma("journal_mode") == "delete"
+            assert READ_ONLY_BIND not in db.engines
+
+
+def test_public_pages_read_through_the_read_only_engine(profile_app):
+    if profile_app.config["DB_PROFILE"] != "web":
+        pytest.skip("only the web profile has a read-only engine")
+    used = []
+    with profile_app.app_context():
+        listener = lambda conn, *args: used.append(conn.engine)  # noqa: E731
+        for engine in db.engines.values():
+            db.event.listen(engine, "before_cursor_execute", listener)
+        state_id = db.session.query(State.id).scalar()
+        used.clear()
+        assert profile_app.test_client().get(f"/api/lgas/{state_id}").status_code == 200
+        assert used and all(engine is db.engines[READ_ONLY_BIND] for engine in used)
+        with pytest.raises(OperationalError, match="readonly"):
+            with db.engines[READ_ONLY_BIND].begin() as conn:
+                conn.execute(db.text("DELETE FROM states"))
+
+
+def test_reads_not_blocked_by_a_writer(profile_app):
+    """While another connection holds an exclusive write lock, as a committing
+    ingest does, a read with busy_timeout = 0 fails unless the file is in WAL."""
+    with profile_app.app_context():
+        reader_engine = db.engines.get(READ_ONLY_BIND, db.engine)
+        writer = db.engine.raw_connection()
+        try:
+            writer.driver_connection.isolation_level = None
+            writer.cursor().execute("BEGIN EXCLUSIVE")
+            writer.cursor().execute("UPDATE states SET geo_zone = geo_zone")
+            with reader_engine.connect() as conn:
+                conn.exec_driver_sql("PRAGMA busy_timeout = 0")
+                try:
+                    assert conn.exec_driver_sql("SELECT COUNT(*) FROM states").scalar() == 1
+                    blocked = False
+                except OperationalError as e:
+                    assert "locked" in str(e)
+                    blocked = True
+                conn.invalidate()  # keep busy_timeout = 0 out of the pool
+            writer.cursor().execute("ROLLBACK")
+        finally:
+            writer.close()
+    assert blocked == (profile_app.config["DB_PROFILE"] != "web")
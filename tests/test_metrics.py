@@ -0,0 +1,23 @@
+"""Request metrics export."""
+
+import os
+
+import pytest
+
+from app import request_metrics
+
+
+@pytest.fixture
+def metrics_app(app):
+    app.config.update(REQUEST_METRICS=True, METRICS_TOKEN="secret")
+    request_metrics.clear()
+    yield app
+    request_metrics.clear()
+
+
+def test_every_series_is_labelled_with_the_worker(metrics_app):
+    client = metrics_app.test_client()
+    client.get("/api/search?q=la")
+    text = client.get("/admin/metrics.txt", headers={"Authorization": "Bearer secret"}).get_data(as_text=True)
+    series = [line for line in text.splitlines() if not line.startswith("#")]
+    assert series and all(f'pid="{os.getpid()}"' in line for line in series)
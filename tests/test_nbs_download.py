@@ -0,0 +1,72 @@
+"""_download_nbs_excel against a local stub of the NBS site."""
+
+import socket
+import time
+from urllib.parse import urlsplit
+
+import pytest
+
+from app import MONTH_NAMES, NBS_MIN_WORKBOOK_BYTES, NBS_URL_PATTERNS, NBSUnavailable, _download_nbs_excel
+
+WORKBOOK = b"PK" + bytes(NBS_MIN_WORKBOOK_BYTES + 1000)
+DELAY = 0.5
+MONTH, YEAR = 1, 2000
+PATHS = [urlsplit(p.format(base="", month=MONTH_NAMES[MONTH], year=YEAR)).path for p in NBS_URL_PATTERNS]
+LAST = len(PATHS) - 1
+
+
+def _routes(routes):
+    """Key routes by URL path instead of pattern index, for the nbs fixture."""
+    return {PATHS[i]: route for i, route in routes.items()}
+
+
+def _download(base_url):
+    """Return (pattern index or None, content, seconds taken)."""
+    start = time.perf_counter()
+    content, url, _ = _download_nbs_excel(MONTH, YEAR, base_url=base_url)
+    elapsed = time.perf_counter() - start
+    found = None if url is None else next(i for i, path in enumerate(PATHS) if url.endswith(path))
+    return found, content, elapsed
+
+
+@pytest.mark.parametrize("routes, expected", [
+    ({LAST: {"body": WORKBOOK}}, LAST),
+    ({0: {"body": WORKBOOK, "head_status": 405}}, 0),  # HEAD rejected: range GET fallback
+    ({0: {"head_status": 503}, 1: {"body": WORKBOOK}}, 1),  # a server error elsewhere doesn't matter
+    ({}, None),
+    ({0: {"body": b"PK" + bytes(10)}}, None),  # too short to be a workbook
+], ids=["last pattern", "head rejected", "server error elsewhere", "nothing published", "too short"])
+def test_finds_workbook(app, nbs, routes, expected):
+    with app.app_context():
+        found, content, _ = _download(nbs(_routes(routes)))
+    assert found == expected
+    assert content == (WORKBOOK if expected is not None else None)
+
+
+def test_probes_overlap(app, nbs):
+    # Every probe and the download take DELAY: in turn that would be 4 * DELAY
+    routes = {i: {"delay": DELAY, **({"body": WORKBOOK} if i == LAST else {})} for i in range(len(PATHS))}
+    with app.app_context():
+        found, _, elapsed = _download(nbs(_routes(routes)))
+    assert found == LAST
+    assert elapsed < DELAY * 3
+
+
+def test_slow_probe_not_waited_for(app, nbs):
+    with app.app_context():
+        found, _, elapsed = _download(nbs(_routes({0: {"delay": DELAY * 6}, 1: {"body": WORKBOOK}})))
+    assert found == 1
+    assert elapsed < DELAY * 4
+
+
+def test_server_error_is_not_missing_data(app, nbs):
+    with app.app_context(), pytest.raises(NBSUnavailable):
+        _download(nbs(_routes({0: {"head_status": 503}})))
+
+
+def test_unreachable_server_is_not_missing_data(app):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]  # nothing listens here once the socket closes
+    with app.app_context(), pytest.raises(NBSUnavailable):
+        _download(f"http://127.0.0.1:{port}")
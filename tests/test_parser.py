@@ -0,0 +1,42 @@
+"""The NBS workbook parser."""
+
+import contextlib
+import io
+
+import pytest
+from openpyxl import Workbook
+
+from app import _build_lga_lookup, _build_state_lookup, _map_header, _parse_workbook_bytes
+from seed_data import STATES_DATA, _insert_states_and_lgas
+
+
+@pytest.fixture
+def lookups(app):
+    from app import db
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        _insert_states_and_lgas()
+        db.session.commit()
+        return _build_state_lookup(), _build_lga_lookup()
+
+
+@pytest.mark.parametrize("header, is_lga", [
+    ("LGA", True), ("LGAs", True), ("Local Government Area", True), ("Name of LGA", True),
+    ("Share to LGAs", False), ("LGA deductions", False), ("State", False),
+])
+def test_lga_column_is_the_whole_header_cell(header, is_lga):
+    assert ("lga" in (_map_header(["S/N", header]) or {})) is is_lga
+
+
+def test_state_sheet_with_lga_amount_columns(lookups):
+    """Columns about LGAs in a state sheet keep it a state sheet."""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["S/N", "State", "Statutory Allocation", "VAT", "LGA Deductions", "Share to LGAs", "Net Allocation"])
+    for i, (name, _, _) in enumerate(STATES_DATA, start=1):
+        ws.append([i, name, 9.0e9, 4.0e9, 1.0e9, 5.0e9, 1.2e10])
+    buf = io.BytesIO()
+    wb.save(buf)
+
+    records = _parse_workbook_bytes(buf.getvalue(), *lookups)
+    assert len(records) == len(STATES_DATA)
+    assert all(r["lga_id"] is None and r["deductions"] == 1.0e9 and r["net"] == 1.2e10 for r in records)
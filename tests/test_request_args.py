@@ -0,0 +1,35 @@
+"""Query parameter validation for the series and analytics APIs."""
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from app import (SERIES_DEFAULT_LIMIT, SERIES_MAX_LIMIT, AnalyticsRequestError, SeriesRequestError,
+                 parse_analytics_args, parse_series_args)
+
+
+@pytest.mark.parametrize("limit", ["ten", "1.5", "0", "-3", str(SERIES_MAX_LIMIT + 1)])
+def test_series_limit_rejected(limit):
+    with pytest.raises(SeriesRequestError, match="limit"):
+        parse_series_args(MultiDict({"limit": limit}))
+
+
+@pytest.mark.parametrize("args, limit", [({}, SERIES_DEFAULT_LIMIT), ({"limit": ""}, SERIES_DEFAULT_LIMIT),
+                                         ({"limit": "12"}, 12)])
+def test_series_limit(args, limit):
+    assert parse_series_args(MultiDict(args))[-1] == limit
+
+
+@pytest.mark.parametrize("limit", ["ten", "1.5", "0", "-3"])
+def test_analytics_limit_rejected(limit):
+    with pytest.raises(AnalyticsRequestError, match="limit"):
+        parse_analytics_args(MultiDict({"limit": limit}))
+
+
+@pytest.mark.parametrize("args, limit", [({}, None), ({"limit": ""}, None), ({"limit": "5"}, 5)])
+def test_analytics_limit(args, limit):
+    assert parse_analytics_args(MultiDict(args))[-1] == limit
+
+
+def test_bad_limit_is_a_400(app):
+    resp = app.test_client().get("/api/analytics/rankings?limit=ten")
+    assert resp.status_code == 400 and "limit" in resp.json["error"]
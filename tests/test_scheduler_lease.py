@@ -0,0 +1,44 @@
+"""Scheduled jobs run in exactly one process, with failover when the leader dies."""
+
+import multiprocessing
+from datetime import datetime, timedelta
+
+from app import SchedulerLease, _lease_holder, create_app, db, run_as_leader
+
+LEASE = "scheduler-test"
+LEASE_SECONDS = 120  # outlives the slowest race; the test expires it by hand
+PROCESSES = 4
+
+
+def _contender(database_uri, barrier, results):
+    """Child process: fire the job at the same moment as the others, then exit
+    without releasing the lease, like a crashed leader."""
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database_uri})
+    barrier.wait()
+    ran = run_as_leader(app, lambda: None, lease=LEASE, seconds=LEASE_SECONDS)
+    results.put(_lease_holder() if ran else None)
+
+
+def _race(database_uri):
+    """Start fresh interpreters that fire the same job at once, as gunicorn
+    workers do when the cron trigger goes off; return the holders that ran it."""
+    ctx = multiprocessing.get_context("spawn")
+    barrier, results = ctx.Barrier(PROCESSES), ctx.Queue()
+    workers = [ctx.Process(target=_contender, args=(database_uri, barrier, results)) for _ in range(PROCESSES)]
+    for proc in workers:
+        proc.start()
+    ran = [holder for holder in (results.get(timeout=60) for _ in workers) if holder]
+    for proc in workers:
+        proc.join()
+    return ran
+
+
+def test_one_leader_with_failover(app):
+    database_uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    assert len(_race(database_uri)) == 1
+    assert _race(database_uri) == []  # the leader is gone but its lease is still live
+    with app.app_context():
+        lease = db.session.get(SchedulerLease, LEASE)
+        lease.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+    assert len(_race(database_uri)) == 1  # the lease ran out: another process takes over